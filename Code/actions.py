@@ -4,16 +4,20 @@ from typing import Optional, Tuple, TYPE_CHECKING
 import color
 import exceptions
 import random
-from components.settings import GENERAL_CHEATS, PlayerClass
+from components.settings import ACTION_COST, GENERAL_CHEATS, SPRINT_COST, PlayerClass
+from entity import Item
 
 if TYPE_CHECKING:
     from engine import Engine
-    from entity import Actor, Entity, Item
+    from entity import Actor, Entity
 
     # import components.effects
 
 
 class Action:
+    # time the action takes at normal speed, see components.scheduler
+    cost = ACTION_COST
+
     def __init__(self, entity: Actor) -> None:
         super().__init__()
         self.entity = entity
@@ -60,12 +64,14 @@ class PickupAction(Action):
         actor_location_y = self.entity.y
         inventory = self.entity.inventory
 
-        for item in self.engine.game_map.items:
-            if actor_location_x == item.x and actor_location_y == item.y:
+        for item in self.engine.game_map.get_entities_at_location(
+            actor_location_x, actor_location_y
+        ):
+            if isinstance(item, Item):
                 if len(inventory.items) >= inventory.capacity:
                     raise exceptions.Impossible("Inventoy full!")
 
-                self.engine.game_map.entities.remove(item)
+                self.engine.game_map.remove_entity(item)
                 item.parent = self.entity.inventory
                 inventory.items.append(item)
 
@@ -132,6 +138,7 @@ class MeleeAction(ActionWithDirection):
         damage = 0
         if not target:
             raise exceptions.Impossible("Nothing to attack.")
+        self.engine.game_map.make_noise(target.x, target.y)
         for i in range(self.entity.fighter.attack_count):
             dmg_chance = random.randint(0, 100)
             if dmg_chance >= target.fighter.damage_reduction:
@@ -193,7 +200,7 @@ class MovementAction(ActionWithDirection):
             raise exceptions.Impossible("The way is blocked!")
         # checks if tile is walkable
         if not GENERAL_CHEATS["noclip"]:
-            if not self.engine.game_map.tiles["walkable"][dest_x, dest_y]:
+            if not self.engine.game_map.tile_field("walkable", (dest_x, dest_y)):
                 raise exceptions.Impossible("Path inaccessible!")
             if self.engine.game_map.get_blocking_entity_at_location(dest_x, dest_y):
                 raise exceptions.Impossible("The path is blocked!")
@@ -202,38 +209,40 @@ class MovementAction(ActionWithDirection):
 
 
 class BumpAction(ActionWithDirection):
+    def __init__(self, entity: Actor, dx: int, dy: int, sprint: bool = False):
+        super().__init__(entity, dx, dy)
+        # a sprinting rouge moves and attacks in half the time for stamina
+        self.sprint = sprint
+        if sprint:
+            self.cost = SPRINT_COST
+
     def perform(self) -> None:
         if self.target_actor:
             # if entity is a vendor meele action is disabled
             if not self.target_actor.name == "Organ trader":
-                if self.entity.player_class == PlayerClass.ROUGE:
-                    MovementCheck(dx=self.dx, dy=self.dy, entity=self.entity)
+                if self.sprint:
+                    self.spend_stamina(10)
                 return MeleeAction(self.entity, self.dx, self.dy).perform()
         else:
-            if "2" in str(self.dx) or "2" in str(self.dy):
-                if not GENERAL_CHEATS["inf_stamina"]:
-                    self.entity.fighter.stamina -= 2
+            if self.sprint:
+                self.spend_stamina(2)
             return MovementAction(self.entity, self.dx, self.dy).perform()
 
-
-# Function to check whether the stamina action of the Rouge is permitted
-def MovementCheck(dx, dy, entity):
-    if "2" in str(dx) or "2" in str(dy) and entity.fighter.stamina >= 10:
-        if not GENERAL_CHEATS["inf_stamina"]:
-            entity.fighter.stamina -= 10
-    else:
-        return dx / 2, dy / 2
+    def spend_stamina(self, amount: int) -> None:
+        # without enough stamina the action takes the normal time
+        if self.entity.fighter.stamina < amount:
+            self.cost = ACTION_COST
+        elif not GENERAL_CHEATS["inf_stamina"]:
+            self.entity.fighter.stamina -= amount
 
 
 class ConsumeCorpseAction(Action):
     def perform(self):
 
-        for corpse in self.engine.game_map.entities:
-            if (
-                corpse.x == self.entity.x
-                and corpse.y == self.entity.y
-                and corpse != self.entity
-            ):
+        for corpse in self.engine.game_map.get_entities_at_location(
+            self.entity.x, self.entity.y
+        ):
+            if corpse != self.entity:
                 corpse.effect.activate(self.engine, corpse)
                 return
         raise exceptions.Impossible("No corpse here")
@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional, Tuple, TYPE_CHECKING
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from components.fighter import Fighter
+    from components.map_masks import WindowMask
+    from entity import Actor
+
+# the Fighter attribute behind every stat column of the index
+FIGHTER_COLUMNS = (
+    ("hp", "_hp"),
+    ("max_hp", "max_hp"),
+    ("power", "power"),
+    ("defense", "defense"),
+    ("damage_reduction", "damage_reduction"),
+)
+COLUMNS = ("xs", "ys") + tuple(column for column, _ in FIGHTER_COLUMNS)
+
+
+class ActorIndex:
+    # the live actors of a map in columns, so targeting and area effects
+    # work on every actor at once instead of one by one
+    # actor i of `actors` stands at xs[i], ys[i] and its fighter stats are
+    # hp[i], power[i]... While an actor is in the index its Fighter reads
+    # and writes those stats in its row (see FighterColumn), a removed
+    # actor gets them copied back and its row is filled with the last one
+    # so the columns stay packed
+    def __init__(self) -> None:
+        self.actors: List[Actor] = []
+        self.slots: Dict[Actor, int] = {}
+        self.xs = np.zeros(16, dtype=np.int32)
+        self.ys = np.zeros(16, dtype=np.int32)
+        self.hp = np.zeros(16, dtype=np.int32)
+        self.max_hp = np.zeros(16, dtype=np.int32)
+        self.power = np.zeros(16, dtype=np.int32)
+        self.defense = np.zeros(16, dtype=np.int32)
+        self.damage_reduction = np.zeros(16, dtype=np.int32)
+
+    def __len__(self) -> int:
+        return len(self.actors)
+
+    def __contains__(self, actor: Actor) -> bool:
+        return actor in self.slots
+
+    def add(self, actor: Actor) -> None:
+        if actor in self.slots:
+            return
+        slot = len(self.actors)
+        if slot == len(self.xs):
+            for column in COLUMNS:
+                setattr(self, column, np.resize(getattr(self, column), 2 * slot))
+        self.actors.append(actor)
+        self.slots[actor] = slot
+        self.xs[slot] = actor.x
+        self.ys[slot] = actor.y
+        fighter = actor.fighter
+        for column, attribute in FIGHTER_COLUMNS:
+            getattr(self, column)[slot] = getattr(fighter, attribute)
+        fighter.store = self
+        fighter.slot = slot
+
+    def discard(self, actor: Actor) -> None:
+        slot = self.slots.pop(actor, None)
+        if slot is None:
+            return
+        actor.fighter.detach()
+        last = self.actors.pop()
+        if last is not actor:
+            self.actors[slot] = last
+            self.slots[last] = slot
+            for column in COLUMNS:
+                values = getattr(self, column)
+                values[slot] = values[len(self.actors)]
+            last.fighter.slot = slot
+
+    def move(self, actor: Actor) -> None:
+        # called after the actor changed its coordinates
+        slot = self.slots.get(actor)
+        if slot is not None:
+            self.xs[slot] = actor.x
+            self.ys[slot] = actor.y
+
+    def distances(self, x: int, y: int) -> np.ndarray:
+        # euclidean distance from x, y to every actor, same as Entity.distance
+        count = len(self.actors)
+        return np.hypot(self.xs[:count] - x, self.ys[:count] - y)
+
+    def visible(self, mask: WindowMask) -> np.ndarray:
+        # whether every actor stands on a tile the mask is True for
+        count = len(self.actors)
+        return mask.take(self.xs[:count], self.ys[:count])
+
+    def within(self, x: int, y: int, radius: float) -> np.ndarray:
+        # the slots of the actors no further than radius from x, y
+        (slots,) = np.nonzero(self.distances(x, y) <= radius)
+        return slots
+
+    def nearest(
+        self,
+        x: int,
+        y: int,
+        max_distance: float,
+        exclude: Optional[Actor] = None,
+        visible: Optional[WindowMask] = None,
+    ) -> Tuple[Optional[Actor], float]:
+        # the closest actor nearer than max_distance and its distance,
+        # (None, max_distance) if there is none. With `visible` only actors
+        # standing on a visible tile count.
+        distances = self.distances(x, y)
+        if exclude is not None and exclude in self.slots:
+            distances[self.slots[exclude]] = np.inf
+        if visible is not None:
+            distances[~self.visible(visible)] = np.inf
+        if not len(distances):
+            return None, max_distance
+        slot = int(np.argmin(distances))
+        if distances[slot] >= max_distance:
+            return None, max_distance
+        return self.actors[slot], float(distances[slot])
+
+    def take_damage(
+        self, slots: np.ndarray, amount: int, ignore_defence: bool = False
+    ) -> np.ndarray:
+        # Fighter.take_damage for many actors at once, returns the damage
+        # every one took. Nobody dies here, see sweep_dead.
+        if ignore_defence:
+            damage = np.full(len(slots), amount, dtype=np.int32)
+        else:
+            damage = amount - self.defense[slots]
+        self.hp[slots] = np.clip(self.hp[slots] - damage, 0, self.max_hp[slots])
+        return damage
+
+    def sweep_dead(self) -> None:
+        # lets every actor whose hp dropped to 0 in a bulk operation die
+        count = len(self.actors)
+        (dead,) = np.nonzero(self.hp[:count] == 0)
+        for actor in [self.actors[slot] for slot in dead.tolist()]:
+            if actor.ai:
+                actor.fighter.die()
+
+
+class FighterColumn:
+    # a Fighter stat that lives in the actor's row of the ActorIndex while
+    # the actor is on a map, and in the Fighter itself otherwise
+    def __init__(self, column: str) -> None:
+        self.column = column
+
+    def __set_name__(self, owner: type, name: str) -> None:
+        self.name = name
+
+    def __get__(self, fighter: Optional[Fighter], owner: Any = None) -> Any:
+        if fighter is None:
+            return self
+        store = fighter.store
+        if store is None:
+            return fighter.__dict__[self.name]
+        return int(getattr(store, self.column)[fighter.slot])
+
+    def __set__(self, fighter: Fighter, value: int) -> None:
+        store = fighter.store
+        if store is None:
+            fighter.__dict__[self.name] = value
+        else:
+            getattr(store, self.column)[fighter.slot] = value
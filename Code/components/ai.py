@@ -14,6 +14,8 @@ from actions import (
     WaitAction,
     BumpAction,
 )
+from components.settings import PATH_MARGIN
+import exceptions
 
 
 if TYPE_CHECKING:
@@ -21,24 +23,145 @@ if TYPE_CHECKING:
 
 
 class BaseAI(Action):
+    # whether the engine may put the actor to sleep while it is far away
+    # from the player and has no path to follow
+    can_sleep = True
+    # the path AIs that chase walk along, see update_path
+    path: List[Tuple[int, int]]
+    # where the path leads and the blocker version it was last checked against
+    path_target: Optional[Tuple[int, int]] = None
+    path_version = -1
+
     def perform(self) -> None:
         raise NotImplementedError()
 
-    def get_path_to(self, dest_x: int, dest_y: int) -> list[Tuple[int, int]]:
-        cost = np.array(self.entity.gamemap.tiles["walkable"], dtype=np.int8)
-        for entity in self.entity.gamemap.entities:
-            if entity.blocks_movement and cost[entity.x, entity.y]:
-                cost[entity.x, entity.y] += 10
-
-        graph = tcod.path.SimpleGraph(cost=cost, cardinal=2, diagonal=2)
-        pathfinder = tcod.path.Pathfinder(graph)
-        pathfinder.add_root((self.entity.x, self.entity.y))
+    def update_path(self, target: Actor) -> None:
+        # keeps self.path leading to the target, the path of the last turns
+        # is reused and only its tail repaired when the target moved a step,
+        # a new search only happens when that's not enough
+        if not self.repair_path(target):
+            if target is self.engine.player:
+                self.path = self.get_path_to_player()
+            else:
+                self.path = self.get_path_to(target.x, target.y)
+            self.path_target = (target.x, target.y)
+        self.path_version = self.entity.gamemap.blocker_version
+
+    def repair_path(self, target: Actor) -> bool:
+        # returns False if the path has to be searched again
+        gamemap = self.entity.gamemap
+        if not self.path or self.path_target is None:
+            return False
+        x, y = self.entity.x, self.entity.y
+        next_x, next_y = self.path[0]
+        # a step was skipped or the actor got pushed off the path
+        if max(abs(next_x - x), abs(next_y - y)) != 1:
+            return False
+        # someone stands on the next step, whenever they got there
+        blocker = gamemap.get_blocking_entity_at_location(next_x, next_y)
+        if blocker is not None and blocker is not target:
+            return False
+
+        changes = gamemap.blocker_changes_since(self.path_version)
+        if changes is None:
+            return False
+        target_xy = (target.x, target.y)
+        # the target itself moving doesn't block the path, unless someone
+        # else moved onto the tile it left
+        ignored = {target_xy}
+        if gamemap.get_blocking_entity_at_location(*self.path_target) in (
+            None,
+            target,
+        ):
+            ignored.add(self.path_target)
+        if changes and not {*changes}.isdisjoint(set(self.path) - ignored):
+            return False
+
+        if target_xy != self.path_target:
+            old_x, old_y = self.path_target
+            if max(abs(target.x - old_x), abs(target.y - old_y)) > 1:
+                return False
+            if target_xy in self.path:
+                # the target stepped onto the path, cut what's behind it
+                del self.path[self.path.index(target_xy) + 1 :]
+            else:
+                self.path.append(target_xy)
+            self.path_target = target_xy
+
+        # following the target around makes the path wind, search again
+        # once it is much longer than the distance
+        distance = max(abs(target.x - x), abs(target.y - y))
+        return len(self.path) <= 2 * distance + 2
+
+    def follow_path(self) -> None:
+        # takes the first step of the path, only a step that was taken
+        # leaves the path and one that failed makes update_path search again
+        dest_x, dest_y = self.path[0]
+        try:
+            MovementAction(
+                self.entity,
+                dest_x - self.entity.x,
+                dest_y - self.entity.y,
+            ).perform()
+        except exceptions.Impossible:
+            self.path_target = None
+            raise
+        self.path.pop(0)
 
-        path: List[List[int]] = pathfinder.path_to((dest_x, dest_y))[1:].tolist()
-        return [(index[0], index[1]) for index in path]
+    def get_path_to(self, dest_x: int, dest_y: int) -> list[Tuple[int, int]]:
+        gamemap = self.entity.gamemap
+        cost = gamemap.movement_cost()
+        x, y = self.entity.x, self.entity.y
+
+        # a chase is short, search the box around both ends first
+        left = max(0, min(x, dest_x) - PATH_MARGIN)
+        top = max(0, min(y, dest_y) - PATH_MARGIN)
+        right = min(gamemap.width, max(x, dest_x) + PATH_MARGIN + 1)
+        bottom = min(gamemap.height, max(y, dest_y) + PATH_MARGIN + 1)
+        window = cost[left:right, top:bottom]
+        path = search_path(window, (x, y), (dest_x, dest_y), (left, top))
+        if not path and window.shape != cost.shape:
+            path = search_path(cost, (x, y), (dest_x, dest_y), (0, 0))
+        return path
+
+    def get_path_to_player(self) -> list[Tuple[int, int]]:
+        # walks down the distance map the engine shares between all AIs this turn
+        pathfinder = self.engine.get_player_pathfinder()
+        origin_x, origin_y = self.engine.player_path_origin
+        x, y = self.entity.x - origin_x, self.entity.y - origin_y
+        width, height = pathfinder.distance.shape
+        if 0 <= x < width and 0 <= y < height:
+            path: List[List[int]] = pathfinder.path_from((x, y))[1:].tolist()
+            if path:
+                return [(index[0] + origin_x, index[1] + origin_y) for index in path]
+        # outside the distance map or no way inside it
+        player = self.engine.player
+        return self.get_path_to(player.x, player.y)
+
+
+def search_path(
+    cost: np.ndarray,
+    start: Tuple[int, int],
+    dest: Tuple[int, int],
+    origin: Tuple[int, int],
+) -> list[Tuple[int, int]]:
+    # searches a path on a window of the cost grid, start, dest and the
+    # returned path are in map coordinates, origin is the window's corner
+    origin_x, origin_y = origin
+    graph = tcod.path.SimpleGraph(cost=cost, cardinal=2, diagonal=2)
+    pathfinder = tcod.path.Pathfinder(graph)
+    pathfinder.add_root((start[0] - origin_x, start[1] - origin_y))
+
+    path: List[List[int]] = pathfinder.path_to(
+        (dest[0] - origin_x, dest[1] - origin_y)
+    )[1:].tolist()
+    return [(index[0] + origin_x, index[1] + origin_y) for index in path]
 
 
 class ConfusedEnemy(BaseAI):
+    # the confusion has to wear off
+    can_sleep = False
+
     def __init__(self, entity, previous_ai: Optional[BaseAI], turns_remaining):
         super().__init__(entity)
         self.previous_ai = previous_ai
@@ -80,15 +203,10 @@ class HostileEnemy(BaseAI):
         if self.engine.game_map.visible[self.entity.x, self.entity.y]:
             if distance <= 1:
                 return MeleeAction(self.entity, dx, dy).perform()
-            self.path = self.get_path_to(target.x, target.y)
+            self.update_path(target)
 
         if self.path:
-            dest_x, dest_y = self.path.pop(0)
-            return MovementAction(
-                self.entity,
-                dest_x - self.entity.x,
-                dest_y - self.entity.y,
-            ).perform()
+            return self.follow_path()
 
         return WaitAction(self.entity).perform()
 
@@ -103,17 +221,19 @@ class HostileCaster(BaseAI):
         target = self.engine.player
         dx = target.x - self.entity.x
         dy = target.y - self.entity.y
-        closest_distance = 10
         distance = max(abs(dx), abs(dy))
-        for actor in self.engine.game_map.actors:
-            if (
-                actor.x != self.entity.x and actor.y != self.entity.y
-            ) and self.engine.game_map.visible[actor.x, actor.y]:
-                distance = self.entity.distance(actor.x, actor.y)
-
-                if distance < closest_distance:
-                    target = actor
-                    closest_distance = distance
+        # the closest visible actor, the player if none is within 10
+        gamemap = self.engine.game_map
+        closest, closest_distance = gamemap.live_actors.nearest(
+            self.entity.x,
+            self.entity.y,
+            10,
+            exclude=self.entity,
+            visible=gamemap.visible,
+        )
+        if closest is not None:
+            target = closest
+            distance = closest_distance
         if (
             distance < 10
             and distance > 4
@@ -130,7 +250,10 @@ class HostileCaster(BaseAI):
             if self.engine.game_map.visible[self.entity.x, self.entity.y]:
                 if distance <= 1:
                     return MeleeAction(self.entity, dx, dy).perform()
-                self.path = self.get_path_to(target.x, target.y)
+                if target is self.engine.player:
+                    self.path = self.get_path_to_player()
+                else:
+                    self.path = self.get_path_to(target.x, target.y)
 
             if self.path:
                 dest_x, dest_y = self.path.pop(0)
@@ -150,6 +273,9 @@ class Vendor(BaseAI):
 
 
 class ViceraAbomination(BaseAI):
+    # keeps spawning wherever the player is
+    can_sleep = False
+
     def __init__(self, entity: Actor) -> None:
         super().__init__(entity)
         self.turn_count = 0
@@ -166,22 +292,20 @@ class ViceraAbomination(BaseAI):
             self.turn_count = 0
             from entity_factory import vicera_spawn
 
-            vicera_spawn.spawn(self.engine.game_map, self.entity.x, self.entity.y)
+            game_map = self.engine.game_map
+            game_map.spawn_many(
+                vicera_spawn, game_map.find_free_tiles(self.entity.x, self.entity.y, 1)
+            )
         else:
             self.turn_count += 1
 
         if self.engine.game_map.visible[self.entity.x, self.entity.y]:
             if distance <= 1:
                 return MeleeAction(self.entity, dx, dy).perform()
-            self.path = self.get_path_to(target.x, target.y)
+            self.update_path(target)
 
         if self.path:
-            dest_x, dest_y = self.path.pop(0)
-            return MovementAction(
-                self.entity,
-                dest_x - self.entity.x,
-                dest_y - self.entity.y,
-            ).perform()
+            return self.follow_path()
 
         return WaitAction(self.entity).perform()
 
@@ -204,7 +328,7 @@ class BloatedCorpseFly(BaseAI):
         if self.engine.game_map.visible[self.entity.x, self.entity.y]:
             if distance <= 1:
                 return MeleeAction(self.entity, dx, dy).perform()
-            self.path = self.get_path_to(target.x, target.y)
+            self.path = self.get_path_to_player()
 
         if self.path:
             dest_x, dest_y = self.path.pop(1)
@@ -74,17 +74,7 @@ class FireballDamageConsumable(Consumable):
         if not self.engine.game_map.visible[target_xy]:
             raise Impossible("Area not Visible")
 
-        tarets_hit = False
-
-        for actor in self.engine.game_map.actors:
-            if actor.distance(*target_xy) <= self.radius:
-                living_name = actor.name
-                real_damage = actor.fighter.take_damage(self.damage)
-                self.engine.message_log.add_message(
-                    f"{living_name} explodes in fire taking {real_damage} HP"
-                )
-                tarets_hit = True
-        if not tarets_hit:
+        if not self.engine.game_map.area_damage(target_xy, self.radius, self.damage):
             raise Impossible("No targets in radius")
         self.consume()
 
@@ -99,16 +89,14 @@ class LightningDamageConsumable(Consumable):
         self, action: actions.ItemAction, is_npc: Optional[bool] = False
     ) -> None:
         consumer = action.entity
-        target = None
-        closest_distance = self.maximum_range + 1.0
-
-        for actor in self.engine.game_map.actors:
-            if actor is not consumer and self.parent.gamemap.visible[actor.x, actor.y]:
-                distance = consumer.distance(actor.x, actor.y)
-
-                if distance < closest_distance:
-                    target = actor
-                    closest_distance = distance
+        gamemap = self.engine.game_map
+        target, _ = gamemap.live_actors.nearest(
+            consumer.x,
+            consumer.y,
+            self.maximum_range + 1.0,
+            exclude=consumer,
+            visible=gamemap.visible,
+        )
 
         if target:
             living_name = target.name
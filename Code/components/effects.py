@@ -61,7 +61,7 @@ class Effect:
                 color.corpse_consumption,
             )
         if corpse in engine.game_map.entities:
-            engine.game_map.entities.remove(corpse)
+            engine.game_map.remove_entity(corpse)
         engine.player.fighter.derive_Effects()
 
     def add_currency(self, engine: Engine, amount: int):
@@ -130,7 +130,7 @@ class Lvl5BossEffect(Effect):
             if "Gore" in entity.name:
                 gorebound = entity
         if gorebound != "":
-            engine.game_map.entities.remove(gorebound)
+            engine.game_map.remove_entity(gorebound)
         if corpse.name not in engine.player.logbook.book:
             super().activate(engine, corpse, False)
             engine.player.is_mage = True
@@ -353,7 +353,7 @@ class GoreboundEffect(Effect):
             if "Helix" in entity.name:
                 helixbound = entity
         if helixbound:
-            engine.game_map.entities.remove(helixbound)
+            engine.game_map.remove_entity(helixbound)
             engine.player.is_fighter = True
             engine.player.is_rouge = False
             engine.player.fighter.base_hp = 40
@@ -432,13 +432,15 @@ class BossEffect(Effect):
             f"From consuming the strange flesh of the {corpse.name} your vision fades for a second"
         )
 
-        engine.game_map = generate_boss_room_empty(
-            engine=engine,
-            map_width=engine.game_world.map_width,
-            map_height=engine.game_world.map_height,
-            current_floor=engine.game_world.current_floor,
-            current_x=engine.player.x,
-            current_y=engine.player.y,
+        engine.game_world.enter_floor(
+            generate_boss_room_empty(
+                engine=engine,
+                map_width=engine.game_world.map_width,
+                map_height=engine.game_world.map_height,
+                current_floor=engine.game_world.current_floor,
+                current_x=engine.player.x,
+                current_y=engine.player.y,
+            )
         )
         return super().activate(engine, corpse, first)
 
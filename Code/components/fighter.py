@@ -3,7 +3,7 @@ from __future__ import annotations
 from typing import TYPE_CHECKING, Optional
 import random
 import color
-import copy
+from components.actor_index import FIGHTER_COLUMNS, FighterColumn
 from components.base_component import BaseComponent
 from render_order import RenderOrder
 from components.spells import Spell
@@ -12,11 +12,22 @@ from components.consumption import ConsumptionFactory
 from components.settings import GENERAL_CHEATS
 
 if TYPE_CHECKING:
+    from components.actor_index import ActorIndex
     from entity import Actor
 
 
 class Fighter(BaseComponent):
     parent: Actor
+    # the stats area effects work on in bulk, they live in the actor index
+    # of the map while the actor is on one
+    _hp = FighterColumn("hp")
+    max_hp = FighterColumn("max_hp")
+    power = FighterColumn("power")
+    defense = FighterColumn("defense")
+    damage_reduction = FighterColumn("damage_reduction")
+    # the index and row holding them, None while off a map
+    store: Optional[ActorIndex] = None
+    slot = 0
 
     def __init__(
         self,
@@ -72,6 +83,14 @@ class Fighter(BaseComponent):
 
         self.current_effects = []
 
+    def detach(self) -> None:
+        # takes the stats back from the actor index
+        values = {
+            attribute: getattr(self, attribute) for _, attribute in FIGHTER_COLUMNS
+        }
+        self.store = None
+        self.__dict__.update(values)
+
     @property
     def hp(self) -> int:
         return self._hp
@@ -107,10 +126,11 @@ class Fighter(BaseComponent):
 
         self.parent.char = "%"
         self.parent.color = (191, 0, 0)
-        self.parent.blocks_movement = False
+        self.parent.set_blocks_movement(False)
         self.parent.ai = None
+        self.parent.gamemap.live_actors.discard(self.parent)
         self.parent.name = f"remains of {self.parent.name}"
-        self.parent.render_order = RenderOrder.CORPSE
+        self.parent.set_render_order(RenderOrder.CORPSE)
 
         self.engine.message_log.add_message(death_message, death_message_color)
         self.engine.player.level.add_xp(self.parent.level.xp_given)
@@ -119,7 +139,7 @@ class Fighter(BaseComponent):
         # drop item on death
         if random.randint(0, 100) < 20 and len(self.parent.inventory.items) > 0:
             item = random.choice(self.parent.inventory.items)
-            clone = copy.deepcopy(item)
+            clone = item.clone()
             clone.place(x=self.parent.x, y=self.parent.y, gamemap=self.engine.game_map)
             self.engine.message_log.add_message(
                 f"{self.parent.name.replace('remains of ', '')} dropped {clone.name}"
@@ -154,6 +174,7 @@ class Fighter(BaseComponent):
         return int(amount_recovered)
 
     def take_damage(self, amount: int, ignore_defence: Optional[bool] = False) -> int:
+        self.parent.gamemap.make_noise(self.parent.x, self.parent.y)
         if not ignore_defence:
             self.hp -= amount - self.defense
             return amount - self.defense
@@ -186,11 +207,14 @@ class Fighter(BaseComponent):
             death_amount = 30
             from entity_factory import corpse_fly
 
+            game_map = self.engine.game_map
+            positions = game_map.find_free_tiles(
+                self.parent.x, self.parent.y, death_amount
+            )
             self.engine.message_log.add_message(
-                f"The {self.parent.name} dies and from its corpse burst {death_amount} creatures"
+                f"The {self.parent.name} dies and from its corpse burst {len(positions)} creatures"
             )
-            for i in range(death_amount):
-                corpse_fly.spawn(self.engine.game_map, x=self.parent.x, y=self.parent.y)
+            game_map.spawn_many(corpse_fly, positions)
 
     def reset_self(self):
         self.hp = self.max_hp
@@ -0,0 +1,47 @@
+import os
+import tempfile
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+# bump this whenever procgen changes the layout a seed produces,
+# old cache entries are then simply never looked up again
+LAYOUT_VERSION = 3
+
+Room = Tuple[int, int, int, int]
+
+
+class FloorCache:
+    # stores generated floor layouts (tile id grid and room corners) on disk
+    # keyed by run seed, floor number and the map parameters
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+
+    def get_path(self, key: Tuple[int, ...]) -> str:
+        name = "_".join(str(part) for part in key)
+        return os.path.join(self.directory, f"floor_v{LAYOUT_VERSION}_{name}.npz")
+
+    def load(self, key: Tuple[int, ...]) -> Optional[Tuple[np.ndarray, List[Room]]]:
+        try:
+            with np.load(self.get_path(key)) as data:
+                tile_ids = data["tile_ids"]
+                rooms = [tuple(int(v) for v in room) for room in data["rooms"]]
+        except (FileNotFoundError, OSError, KeyError, ValueError):
+            return None
+        return tile_ids, rooms
+
+    def save(
+        self, key: Tuple[int, ...], tile_ids: np.ndarray, rooms: List[Room]
+    ) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.get_path(key)
+        # floors are generated on a worker thread, write to a temp file and
+        # rename so a reader never sees half a file
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            np.savez_compressed(
+                f,
+                tile_ids=tile_ids,
+                rooms=np.array(rooms, dtype=np.int32).reshape(-1, 4),
+            )
+        os.replace(temp_path, path)
@@ -0,0 +1,82 @@
+from typing import Any, Tuple, Union
+
+import numpy as np
+
+# Boolean masks the size of a map that don't store every tile as a byte.
+# Both index like a (width, height) bool array: mask[x, y] gives a bool,
+# mask[slice_x, slice_y] gives a new array and np.asarray(mask) the whole map.
+
+Window = Tuple[slice, slice]
+
+
+class WindowMask:
+    # only a window of the map can be True, e.g. the fov around the player
+    # everything outside the window is False and not stored
+    def __init__(self, shape: Tuple[int, int]) -> None:
+        self.shape = shape
+        self.window: Window = (slice(0, 0), slice(0, 0))
+        self.data = np.zeros((0, 0), dtype=bool)
+
+    def set_window(self, window: Window, data: np.ndarray) -> None:
+        # replaces the whole mask, data covers the window
+        self.window = window
+        self.data = data
+
+    def __getitem__(self, key: Tuple[Any, Any]) -> Union[bool, np.ndarray]:
+        x, y = key
+        if isinstance(x, slice) or isinstance(y, slice):
+            return self.full()[key]
+        window_x, window_y = self.window
+        if window_x.start <= x < window_x.stop and window_y.start <= y < window_y.stop:
+            return bool(self.data[x - window_x.start, y - window_y.start])
+        return False
+
+    def take(self, xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+        # mask[x, y] for every pair of coordinates at once
+        window_x, window_y = self.window
+        inside = (
+            (xs >= window_x.start)
+            & (xs < window_x.stop)
+            & (ys >= window_y.start)
+            & (ys < window_y.stop)
+        )
+        values = np.zeros(len(xs), dtype=bool)
+        values[inside] = self.data[
+            xs[inside] - window_x.start, ys[inside] - window_y.start
+        ]
+        return values
+
+    def full(self) -> np.ndarray:
+        full = np.zeros(self.shape, dtype=bool, order="F")
+        full[self.window] = self.data
+        return full
+
+    def __array__(self, dtype: Any = None, copy: Any = None) -> np.ndarray:
+        full = self.full()
+        return full if dtype is None else full.astype(dtype)
+
+
+class PackedMask:
+    # 8 tiles to a byte, packed along y so a column range unpacks at once
+    def __init__(self, shape: Tuple[int, int]) -> None:
+        self.shape = shape
+        self.bits = np.zeros((shape[0], (shape[1] + 7) // 8), dtype=np.uint8)
+
+    def _unpack(self, x: Any) -> np.ndarray:
+        return np.unpackbits(self.bits[x], axis=-1, count=self.shape[1]).view(bool)
+
+    def __getitem__(self, key: Tuple[Any, Any]) -> Union[bool, np.ndarray]:
+        x, y = key
+        value = self._unpack(x)[..., y]
+        return bool(value) if value.ndim == 0 else value
+
+    def update(self, window: Window, values: np.ndarray) -> None:
+        # sets the tiles of the window where values is True
+        window_x, window_y = window
+        columns = self._unpack(window_x)
+        columns[:, window_y] |= values
+        self.bits[window_x] = np.packbits(columns, axis=1)
+
+    def __array__(self, dtype: Any = None, copy: Any = None) -> np.ndarray:
+        full = self._unpack(slice(None))
+        return full if dtype is None else full.astype(dtype)
@@ -1,15 +1,59 @@
-import random
+from typing import Optional, Tuple
 import numpy as np
 
 
-def build_map_new(shape):
+def build_map_new(
+    shape: Tuple[int, int],
+    seed: Optional[int] = None,
+    octaves: int = 4,
+    threshold: float = 0.38,
+) -> np.ndarray:
+    # returns a boolean mask of the given shape, True where the floor is
+    # low noise values become floor, so a higher threshold means more cave
+    return value_noise(shape, seed=seed, octaves=octaves) < threshold
+
+
+def value_noise(
+    shape: Tuple[int, int],
+    seed: Optional[int] = None,
+    octaves: int = 4,
+    scale: float = 24.0,
+    persistence: float = 0.5,
+) -> np.ndarray:
+    # fractal value noise in the range [0, 1]
+    # every octave is a random lattice smoothly interpolated over the whole
+    # array at once, the next octave has half the cell size and less weight
+    rng = np.random.default_rng(seed)
     world = np.zeros(shape)
-    for x in range(shape[0]):
-        for y in range(shape[1]):
-            world[x][y] = perlin()
+    amplitude = 1.0
+    total_amplitude = 0.0
+
+    for octave in range(octaves):
+        cell_size = max(scale / 2**octave, 1.0)
+        lattice = rng.random((
+            int(shape[0] / cell_size) + 2,
+            int(shape[1] / cell_size) + 2,
+        ))
+
+        x = np.arange(shape[0]) / cell_size
+        y = np.arange(shape[1]) / cell_size
+        x0 = x.astype(np.intp)
+        y0 = y.astype(np.intp)
+        tx = _fade(x - x0)[:, np.newaxis]
+        ty = _fade(y - y0)[np.newaxis, :]
+        x0 = x0[:, np.newaxis]
+        y0 = y0[np.newaxis, :]
+
+        top = lattice[x0, y0] * (1 - tx) + lattice[x0 + 1, y0] * tx
+        bottom = lattice[x0, y0 + 1] * (1 - tx) + lattice[x0 + 1, y0 + 1] * tx
+        world += amplitude * (top * (1 - ty) + bottom * ty)
+
+        total_amplitude += amplitude
+        amplitude *= persistence
 
-    return world
+    return world / total_amplitude
 
 
-def perlin():
-    return random.randint(0, 100)
+def _fade(t: np.ndarray) -> np.ndarray:
+    # smoothstep so the lattice cells don't show as straight edges
+    return t * t * (3 - 2 * t)
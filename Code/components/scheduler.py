@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import heapq
+from typing import Dict, List, Optional, Tuple, TYPE_CHECKING
+
+from components.settings import ACTION_COST, NORMAL_SPEED
+
+if TYPE_CHECKING:
+    from entity import Actor
+
+# size of the chunks dormant actors are bucketed in, a wake up only
+# looks at the chunks the wake radius overlaps
+CHUNK_SIZE = 16
+
+
+def action_time(cost: int = ACTION_COST, speed: int = NORMAL_SPEED) -> int:
+    # how long an action takes, an actor at twice the normal speed acts twice
+    # as often and a sprint costs less than a normal action
+    return max(1, cost * NORMAL_SPEED // speed)
+
+
+class ActivityScheduler:
+    # decides which actors of a map act and when
+    # awake actors wait in a queue ordered by the time of their next action,
+    # actors far from the player with nothing left to do are put to sleep,
+    # a dormant actor costs nothing per turn until the player comes close
+    # or a noise reaches it
+    def __init__(self) -> None:
+        # time of the action that is being performed right now
+        self.time = 0
+        # (time, sequence number, actor), the sequence number keeps actors
+        # acting at the same time in the order they were scheduled
+        self.queue: List[Tuple[int, int, Actor]] = []
+        # the sequence number of the queue entry of every awake actor,
+        # entries of actors that were rescheduled, put to sleep or removed
+        # are left in the queue and skipped when they come up
+        self.entries: Dict[Actor, int] = {}
+        self.sequence = 0
+        self.dormant: Dict[Tuple[int, int], Dict[Actor, None]] = {}
+        # the chunk every dormant actor is bucketed in
+        self.dormant_chunks: Dict[Actor, Tuple[int, int]] = {}
+
+    def add(self, actor: Actor) -> None:
+        # new actors start awake and go to sleep after their first action
+        self.schedule(actor, self.time + action_time(speed=actor.speed))
+
+    def schedule(self, actor: Actor, time: int) -> None:
+        self.sequence += 1
+        self.entries[actor] = self.sequence
+        heapq.heappush(self.queue, (time, self.sequence, actor))
+
+    def next_actor(self, until: int) -> Optional[Actor]:
+        # the next awake actor acting no later than `until`, its time becomes
+        # the current time. The caller reschedules it after it acted.
+        while self.queue and self.queue[0][0] <= until:
+            time, sequence, actor = heapq.heappop(self.queue)
+            if self.entries.get(actor) == sequence:
+                self.time = time
+                return actor
+        self.time = until
+        return None
+
+    def is_awake(self, actor: Actor) -> bool:
+        return actor in self.entries
+
+    def discard(self, actor: Actor) -> None:
+        self.entries.pop(actor, None)
+        self._unbucket(actor)
+
+    def is_dormant(self, actor: Actor) -> bool:
+        return actor in self.dormant_chunks
+
+    def sleep(self, actor: Actor) -> None:
+        self.entries.pop(actor, None)
+        chunk = (actor.x // CHUNK_SIZE, actor.y // CHUNK_SIZE)
+        self.dormant.setdefault(chunk, {})[actor] = None
+        self.dormant_chunks[actor] = chunk
+
+    def wake(self, actor: Actor) -> None:
+        if self._unbucket(actor):
+            self.add(actor)
+
+    def wake_near(self, x: int, y: int, radius: int) -> None:
+        # wakes every dormant actor within radius (chebyshev) of x, y
+        first_x, last_x = (x - radius) // CHUNK_SIZE, (x + radius) // CHUNK_SIZE
+        first_y, last_y = (y - radius) // CHUNK_SIZE, (y + radius) // CHUNK_SIZE
+        for chunk_x in range(first_x, last_x + 1):
+            for chunk_y in range(first_y, last_y + 1):
+                bucket = self.dormant.get((chunk_x, chunk_y))
+                if not bucket:
+                    continue
+                for actor in list(bucket):
+                    if max(abs(actor.x - x), abs(actor.y - y)) <= radius:
+                        self.wake(actor)
+
+    def _unbucket(self, actor: Actor) -> bool:
+        chunk = self.dormant_chunks.pop(actor, None)
+        if chunk is None:
+            return False
+        bucket = self.dormant[chunk]
+        del bucket[actor]
+        if not bucket:
+            del self.dormant[chunk]
+        return True
@@ -1,8 +1,9 @@
-import lzma
 import pickle
 
 from datetime import datetime
 
+import file_codecs
+
 
 class Scoreboard:
     def __init__(self) -> None:
@@ -31,7 +32,7 @@ class Scoreboard:
                 return False
 
     def save(self):
-        save_data = lzma.compress(pickle.dumps(self))
+        save_data = file_codecs.encode(pickle.dumps(self))
         with open("scoreboard.sav", "wb") as f:
             f.write(save_data)
 
@@ -40,7 +41,7 @@ class Scoreboard:
         try:
             with open("scoreboard.sav", "rb") as f:
                 board = ""
-                board = pickle.loads(lzma.decompress(f.read()))
+                board = pickle.loads(file_codecs.decode(f.read()))
                 assert isinstance(board, Scoreboard)
                 return board
         except FileNotFoundError:
@@ -130,6 +130,31 @@ KEYBINDS = {
 
 
 FOV = 20
+# actors at normal speed act once per normal action of the player,
+# an actor at twice the speed acts twice. A sprint takes half the time.
+NORMAL_SPEED = 100
+ACTION_COST = 100
+SPRINT_COST = 50
+# enemies further than this from the player with nowhere to go fall dormant
+# and skip their turns until the player comes within this distance again
+WAKE_RADIUS = FOV + 4
+# how far the noise of a fight carries, it wakes dormant enemies
+NOISE_RADIUS = 12
+# paths are searched in the box around both ends grown by this margin,
+# the whole map is only searched when there is no way inside the box
+PATH_MARGIN = 8
+
+SAVE_FILE = "savegame.sav"
+# number of turns between autosaves, reaching a new floor always autosaves
+AUTOSAVE_INTERVAL = 50
+# compression of saves and the scoreboard: "lzma", "zlib" or "none"
+# the level is the lzma preset or zlib level (0 - 9), lower is faster
+SAVE_CODEC = "lzma"
+SAVE_CODEC_LEVEL = 6
+
+# directory generated floor layouts are cached in, keyed by seed and floor
+# None disables the cache, set a path to make regenerating a floor a cache hit
+FLOOR_CACHE_DIR = None
 
 TILE_SET = "Res/sprites.png"
 
@@ -15,15 +15,16 @@ class Spell:
         raise NotImplementedError()
 
     def get_target(self):
+        # the closest visible actor in range
         consumer = self.engine.player
-        self.target = None
-
-        for actor in self.engine.game_map.actors:
-            if actor is not consumer and self.engine.game_map.visible[actor.x, actor.y]:
-                distance = consumer.distance(actor.x, actor.y)
-
-                if distance < self.range:
-                    self.target = actor
+        gamemap = self.engine.game_map
+        self.target, _ = gamemap.live_actors.nearest(
+            consumer.x,
+            consumer.y,
+            self.range,
+            exclude=consumer,
+            visible=gamemap.visible,
+        )
 
 
 class SelfSepll(Spell):
@@ -63,20 +64,13 @@ class FireballSpell(Spell):
         self.radius = radius
 
     def activate(self):
-        tarets_hit = False
         success = self.engine.player.fighter.cast_spell(self)
         if success:
             self.get_target()
             if self.target:
-                for actor in self.engine.game_map.actors:
-                    if actor.distance(*(self.target.x, self.target.y)) <= self.radius:
-                        living_name = actor.name
-                        real_damage = actor.fighter.take_damage(self.damage)
-                        self.engine.message_log.add_message(
-                            f"{living_name} explodes in fire taking {real_damage} HP"
-                        )
-                        tarets_hit = True
-                if not tarets_hit:
+                if not self.engine.game_map.area_damage(
+                    (self.target.x, self.target.y), self.radius, self.damage
+                ):
                     self.engine.message_log.add_message(
                         "No target in range", color.invalid
                     )
@@ -1,22 +1,30 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
+from typing import Optional, Tuple, TYPE_CHECKING
 
-from components.settings import FOV, PlayerClass
+from components.settings import (
+    ACTION_COST,
+    AUTOSAVE_INTERVAL,
+    FOV,
+    PATH_MARGIN,
+    SAVE_FILE,
+    WAKE_RADIUS,
+    PlayerClass,
+)
 from components.scoreboard import Scoreboard
 
-import lzma
-import pickle
-
 from tcod.console import Console
 from tcod.map import compute_fov
+import tcod.path
 
 import exceptions
 
 from game_map import GameMap, GameWorld
 from message_log import MessageLog
 import render_functions
+import save_files
 from components.affix import AffixManager
+from components.scheduler import action_time
 
 if TYPE_CHECKING:
     from entity import Actor
@@ -29,6 +37,10 @@ class Engine:
     item_chances: dict
     enemy_chances: dict
     current_cheat_page: int = 0
+    # distance map rooted at the player, only alive during the enemy turns
+    player_pathfinder: Optional[tcod.path.Pathfinder] = None
+    # map position of the corner of the window player_pathfinder covers
+    player_path_origin: Tuple[int, int] = (0, 0)
 
     def __init__(self, player: Actor):
         self.message_log = MessageLog()
@@ -36,22 +48,85 @@ class Engine:
         self.player = player
         self.affixManager = AffixManager(self)
         self.scoreboard = Scoreboard.load_scoreboard()
+        self.autosaver = save_files.Autosaver(SAVE_FILE, AUTOSAVE_INTERVAL)
 
-    def handle_enemy_turns(self) -> None:
-        for entity in set(self.game_map.actors) - {self.player}:
-            if entity.ai:
+    def handle_enemy_turns(self, cost: int = ACTION_COST) -> None:
+        # the other actors act, in order of time, until the action of the
+        # player that cost `cost` is over
+        scheduler = self.game_map.scheduler
+        player_x, player_y = self.player.x, self.player.y
+        scheduler.wake_near(player_x, player_y, WAKE_RADIUS)
+        player_time = scheduler.time + action_time(cost, self.player.speed)
+        try:
+            # only awake actors are queued, dormant ones cost nothing
+            while entity := scheduler.next_actor(player_time):
+                if entity is self.player or not entity.is_alive or not entity.ai:
+                    scheduler.discard(entity)
+                    continue
+                entity_cost = entity.ai.cost
                 try:
                     entity.ai.perform()
                 except exceptions.Impossible:
                     pass
+                if not scheduler.is_awake(entity):
+                    # left the map while acting
+                    continue
+                if (
+                    entity.ai
+                    and entity.ai.can_sleep
+                    and not getattr(entity.ai, "path", None)
+                    and max(abs(entity.x - player_x), abs(entity.y - player_y))
+                    > WAKE_RADIUS
+                ):
+                    scheduler.sleep(entity)
+                else:
+                    scheduler.schedule(
+                        entity, scheduler.time + action_time(entity_cost, entity.speed)
+                    )
+        finally:
+            # the pathfinder can't be pickled and is stale after this turn anyway
+            self.player_pathfinder = None
+
+    def get_player_pathfinder(self) -> tcod.path.Pathfinder:
+        # built once per enemy turn and shared by every AI chasing the player
+        # enemies only chase what they see, so it only covers the fov radius
+        # plus a margin around the player
+        if self.player_pathfinder is None:
+            x, y = self.player.x, self.player.y
+            radius = FOV + PATH_MARGIN
+            left, top = max(0, x - radius), max(0, y - radius)
+            cost = self.game_map.movement_cost()[
+                left : x + radius + 1, top : y + radius + 1
+            ]
+            graph = tcod.path.SimpleGraph(cost=cost, cardinal=2, diagonal=2)
+            self.player_pathfinder = tcod.path.Pathfinder(graph)
+            self.player_pathfinder.add_root((x - left, y - top))
+            self.player_pathfinder.resolve()
+            self.player_path_origin = (left, top)
+        return self.player_pathfinder
 
     def update_fov(self) -> None:
-        self.game_map.visible[:] = compute_fov(
-            self.game_map.tiles["transparent"],
-            (self.player.x, self.player.y),
+        game_map = self.game_map
+        x, y = self.player.x, self.player.y
+        # nothing that affects the fov changed, e.g. the player waited
+        fov_key = (x, y)
+        if game_map.fov_key == fov_key:
+            return
+
+        # only the window the fov radius can reach is computed
+        window = (
+            slice(max(0, x - FOV), min(game_map.width, x + FOV + 1)),
+            slice(max(0, y - FOV), min(game_map.height, y + FOV + 1)),
+        )
+        visible = compute_fov(
+            game_map.tile_field("transparent", window),
+            (x - window[0].start, y - window[1].start),
             radius=FOV,
         )
-        self.game_map.explored |= self.game_map.visible
+        game_map.visible.set_window(window, visible)
+        game_map.explored.update(window, visible)
+        game_map.fov_key = fov_key
+        game_map.fov_version += 1
 
     def render(self, console: Console) -> None:
         self.game_map.render(console)
@@ -90,6 +165,6 @@ class Engine:
             )
 
     def save_as(self, filename: str) -> None:
-        save_data = lzma.compress(pickle.dumps(self))
-        with open(filename, "wb") as f:
-            f.write(save_data)
+        # let a running autosave finish first, both write the same files
+        self.autosaver.wait()
+        save_files.save_engine(self, filename)
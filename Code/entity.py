@@ -5,7 +5,7 @@ import math
 from typing import Optional, Tuple, Type, TypeVar, TYPE_CHECKING, Union
 
 from render_order import RenderOrder
-from components.settings import PlayerClass
+from components.settings import NORMAL_SPEED, PlayerClass
 
 if TYPE_CHECKING:
     from components.ai import BaseAI
@@ -20,6 +20,15 @@ if TYPE_CHECKING:
     from components.effects import LogBook, Effect
 
 T = TypeVar("T", bound="Entity")
+C = TypeVar("C")
+
+
+def shallow_copy(obj: C) -> C:
+    # same as copy.copy for plain objects but skips the reduce protocol,
+    # spawning calls this for every component of every new entity
+    clone = object.__new__(type(obj))
+    clone.__dict__.update(obj.__dict__)
+    return clone
 
 
 class Entity:
@@ -52,36 +61,66 @@ class Entity:
         self.render_order = render_order
         if parent:
             self.parent = parent
-            parent.entities.add(self)
+            parent.add_entity(self)
 
     @property
     def gamemap(self) -> GameMap:
         return self.parent.gamemap
 
     def spawn(self: T, gamemap: GameMap, x: int, y: int) -> T:
-        clone = copy.deepcopy(self)
+        clone = self.clone()
         clone.x = x
         clone.y = y
         clone.parent = gamemap
-        gamemap.entities.add(clone)
+        gamemap.add_entity(clone)
         return clone
 
+    def clone(self: T) -> T:
+        # returns an unplaced copy of this entity, subclasses only copy
+        # the state that changes during play and share the rest
+        return copy.deepcopy(self)
+
     def place(self, x: int, y: int, gamemap: Optional[GameMap] = None) -> None:
-        self.x = x
-        self.y = y
         if gamemap:
             if hasattr(self, "parent"):
                 if self.parent is self.gamemap:
-                    self.gamemap.entities.remove(self)
+                    self.gamemap.remove_entity(self)
+            # a fresh GameMap may already hold the entity at its old location
+            if self in gamemap.entities:
+                gamemap.remove_entity(self)
+            self.x = x
+            self.y = y
             self.parent = gamemap
-            gamemap.entities.add(self)
+            gamemap.add_entity(self)
+        else:
+            self.relocate(x, y)
+
+    def relocate(self, x: int, y: int) -> None:
+        # changes coordinates and keeps the spatial index of the map in sync
+        old_x, old_y = self.x, self.y
+        self.x = x
+        self.y = y
+        if hasattr(self, "parent") and self.parent is self.gamemap:
+            self.parent.move_entity(self, old_x, old_y)
+
+    def set_render_order(self, render_order: RenderOrder) -> None:
+        # goes through the map so its draw list stays sorted
+        if hasattr(self, "parent") and self.parent is self.gamemap:
+            self.parent.change_render_order(self, render_order)
+        else:
+            self.render_order = render_order
+
+    def set_blocks_movement(self, blocks_movement: bool) -> None:
+        # goes through the map so its pathfinding costs stay up to date
+        self.blocks_movement = blocks_movement
+        if hasattr(self, "parent") and self.parent is self.gamemap:
+            self.parent.blocker_changed(self.x, self.y)
 
     def distance(self, x: int, y: int) -> float:
         return math.sqrt((x - self.x) ** 2 + (y - self.y) ** 2)
 
     def move(self, dx: int, dy: int) -> None:
-        self.x += dx
-        self.y += dy
+        self.relocate(self.x + dx, self.y + dy)
 
 
 class Actor(Entity):
@@ -101,6 +140,7 @@ class Actor(Entity):
         logbook: LogBook,
         effect: Effect,
         level: Level,
+        speed: int = NORMAL_SPEED,
     ):
         super().__init__(
             x=x,
@@ -112,7 +152,10 @@ class Actor(Entity):
             blocks_movement=True,
             render_order=RenderOrder.ACTOR,
         )
+        self.ai_cls = ai_cls
         self.ai: Optional[BaseAI] = ai_cls(self)
+        # how often the actor acts, see components.scheduler
+        self.speed = speed
 
         self.fighter = fighter
         self.fighter.parent = self
@@ -130,6 +173,41 @@ class Actor(Entity):
         self.logbook: LogBook = logbook
         self.currency = 0
 
+    def clone(self) -> Actor:
+        # name, char, color, effect and the stats of the prototype are shared
+        # only the components get their own copy, without walking their parents
+        clone = shallow_copy(self)
+
+        clone.fighter = shallow_copy(self.fighter)
+        if clone.fighter.store is not None:
+            # the copy gets the stats of the row, not a share of it
+            clone.fighter.detach()
+        clone.fighter.current_effects = list(self.fighter.current_effects)
+        clone.fighter.parent = clone
+
+        clone.level = shallow_copy(self.level)
+        clone.level.parent = clone
+
+        clone.equipment = shallow_copy(self.equipment)
+        clone.equipment.parent = clone
+
+        clone.inventory = shallow_copy(self.inventory)
+        clone.inventory.items = []
+        for item in self.inventory.items:
+            item_clone = item.clone()
+            item_clone.parent = clone.inventory
+            clone.inventory.items.append(item_clone)
+        clone.inventory.parent = clone
+
+        clone.spellbook = shallow_copy(self.spellbook)
+        clone.spellbook.spells = list(self.spellbook.spells)
+
+        clone.logbook = shallow_copy(self.logbook)
+        clone.logbook.book = dict(self.logbook.book)
+
+        clone.ai = self.ai_cls(clone) if self.ai else None
+        return clone
+
     @property
     def player_class(self):
         if self.is_rouge:
@@ -189,3 +267,14 @@ class Item(Entity):
 
         if self.equippable:
             self.equippable.parent = self
+
+    def clone(self) -> Item:
+        # the parent is not copied, the caller places or parents the clone
+        clone = shallow_copy(self)
+        if self.consumable:
+            clone.consumable = shallow_copy(self.consumable)
+            clone.consumable.parent = clone
+        if self.equippable:
+            clone.equippable = shallow_copy(self.equippable)
+            clone.equippable.parent = clone
+        return clone
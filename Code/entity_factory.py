@@ -155,6 +155,7 @@ vicera_abomination = Actor(
     spellbook=SpellBook(0),
     logbook=LogBook(),
     effect=ViceraAbominationEffect(),
+    speed=75,
 )
 
 bloated_corpse_fly = Actor(
@@ -173,6 +174,7 @@ bloated_corpse_fly = Actor(
     spellbook=SpellBook(0),
     logbook=LogBook(),
     effect=BloatedCorpseFlyEffect(),
+    speed=75,
 )
 
 corpse_fly = Actor(
@@ -191,6 +193,7 @@ corpse_fly = Actor(
     spellbook=SpellBook(0),
     logbook=LogBook(),
     effect=DefaultEffect(),
+    speed=150,
 )
 
 
@@ -416,6 +419,7 @@ gnashing_swarm = Actor(
     spellbook=SpellBook(0),
     logbook=LogBook(),
     effect=DefaultEffect(),
+    speed=150,
 )
 
 
@@ -4,3 +4,8 @@ class Impossible(Exception):
 
 class QuitWithoutSaving(SystemExit):
     pass
+
+
+class IncompatibleSave(Exception):
+    # the save was written by a version of the game that can't be loaded
+    pass
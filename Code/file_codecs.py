@@ -0,0 +1,53 @@
+import lzma
+import zlib
+from typing import Callable, Dict, Optional, Tuple
+
+from components.settings import SAVE_CODEC, SAVE_CODEC_LEVEL
+
+# Compression used for save files and the scoreboard.
+# Encoded data starts with a small header: magic, codec id and level.
+# Data without the header is from before codecs existed and is plain lzma.
+
+CODEC_MAGIC = b"FTC"
+
+# name: (id written to the header, compress(data, level), decompress(data))
+CODECS: Dict[
+    str, Tuple[int, Callable[[bytes, int], bytes], Callable[[bytes], bytes]]
+] = {
+    "none": (0, lambda data, level: data, lambda data: data),
+    "zlib": (1, lambda data, level: zlib.compress(data, level), zlib.decompress),
+    "lzma": (
+        2,
+        lambda data, level: lzma.compress(data, preset=level),
+        lzma.decompress,
+    ),
+}
+
+_CODECS_BY_ID = {codec[0]: codec for codec in CODECS.values()}
+
+
+def encode(
+    data: bytes, codec: Optional[str] = None, level: Optional[int] = None
+) -> bytes:
+    # codec and level default to the ones configured in the settings
+    if codec is None:
+        codec = SAVE_CODEC
+    if level is None:
+        level = SAVE_CODEC_LEVEL
+    try:
+        codec_id, compress, _ = CODECS[codec]
+    except KeyError:
+        raise ValueError(f"Unknown codec {codec}") from None
+    return CODEC_MAGIC + bytes((codec_id, level)) + compress(data, level)
+
+
+def decode(data: bytes) -> bytes:
+    if not data.startswith(CODEC_MAGIC):
+        return lzma.decompress(data)
+    header_length = len(CODEC_MAGIC) + 2
+    codec_id = data[len(CODEC_MAGIC)]
+    try:
+        _, _, decompress = _CODECS_BY_ID[codec_id]
+    except KeyError:
+        raise ValueError(f"Unknown codec id {codec_id}") from None
+    return decompress(data[header_length:])
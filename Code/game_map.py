@@ -1,16 +1,38 @@
 from __future__ import annotations
 
-from typing import Iterable, Iterator, Optional, TYPE_CHECKING
+import bisect
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import (
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    TypeVar,
+    TYPE_CHECKING,
+)
 import numpy as np  # type: ignore
 from tcod.console import Console
 import random
+import uuid
 
+from components.actor_index import ActorIndex
+from components.map_masks import PackedMask, WindowMask
+from components.scheduler import ActivityScheduler
+from components.settings import NOISE_RADIUS
 from entity import Actor, Item
 import tile_types
 
 if TYPE_CHECKING:
     from engine import Engine
     from entity import Entity
+    from render_order import RenderOrder
+
+T = TypeVar("T", bound="Entity")
 
 
 class GameMap:
@@ -18,22 +40,80 @@ class GameMap:
         self, engine: Engine, width: int, height: int, entities: Iterable[Entity] = ()
     ):
         self.engine = engine
+        # identifies this floor in save files, the tiles are only written once
+        self.floor_id = uuid.uuid4().hex
         self.vendor_spawned = False
         self.width = width
         self.height = height
-        self.entities = set(entities)
-        self.tiles = np.full(
-            (width, height), fill_value=tile_types.randWall(), order="F"
+        self.entities: Set[Entity] = set()
+        # spatial index of entities bucketed by tile, kept in sync by
+        # add_entity, remove_entity and move_entity
+        self.entity_locations: Dict[Tuple[int, int], Set[Entity]] = {}
+        # draw list, kept sorted by render order as entities come and go
+        self.render_list: List[Entity] = []
+        # True where at least one entity stands, kept in sync with the index
+        self.occupied = np.zeros((width, height), dtype=bool, order="F")
+        # which actors get a turn, see handle_enemy_turns
+        self.scheduler = ActivityScheduler()
+        # positions and fighter stats of the live actors for targeting and
+        # area effects, an actor leaves it when it is removed or dies
+        self.live_actors = ActorIndex()
+        # tiles where a blocking entity came or went, the newest last.
+        # AIs compare blocker_version against the version their path was
+        # checked at to see if a change lies on it
+        self.blocker_version = 0
+        self.blocker_changes: Deque[Tuple[int, int]] = deque(maxlen=1024)
+        # pathfinding cost of every tile, see movement_cost
+        self.cost: Optional[np.ndarray] = None
+        for entity in entities:
+            self.add_entity(entity)
+        # ids into tile_types.TILES, one byte per tile instead of a full record
+        self.tile_ids = np.full(
+            (width, height),
+            fill_value=tile_types.randWallId(),
+            dtype=np.uint8,
+            order="F",
         )
 
-        self.visible = np.full(
-            (width, height), fill_value=False, order="F"
-        )  # this returns tiles the player sees
-        self.explored = np.full(
-            (width, height), fill_value=False, order="F"
-        )  # this is tiles the player has seen before
+        # tiles the player sees, only stored for the window around the player
+        self.visible = WindowMask((width, height))
+        # tiles the player has seen before, stored as bits
+        self.explored = PackedMask((width, height))
+        # tile_ids is only written while procgen builds the floor, once the
+        # player enters it the tiles are fixed. The fov, the cost grid and
+        # the render cache are derived from them and never rebuilt for it.
+        self.fov_key: Optional[Tuple[int, int]] = None
+        # bumped by the engine whenever visible or explored change
+        self.fov_version = 0
+
+        # composited tile layer of the viewport, see render
+        self.viewport_cache: Optional[np.ndarray] = None
+        self.viewport_cache_key: Optional[Tuple[int, ...]] = None
 
         self.upstairs_location = (int(0), int(0))
+        # where the player is put when entering this map
+        self.player_start = (int(0), int(0))
+        self.arrival_message: Optional[str] = None
+
+    def __getstate__(self) -> dict:
+        # the render cache is rebuilt on the first frame after loading
+        state = self.__dict__.copy()
+        state["viewport_cache"] = None
+        state["viewport_cache_key"] = None
+        # so is the cost grid on the first search
+        state["cost"] = None
+        return state
+
+    def tile_field(
+        self, name: str, window: Tuple[slice, slice] = (slice(None), slice(None))
+    ) -> np.ndarray:
+        # a field of the tile records (walkable, transparent, light or dark)
+        # for a window of the map, looked up from the palette
+        return tile_types.TILES[name].take(self.tile_ids[window])
+
+    @property
+    def walkable(self) -> np.ndarray:
+        return self.tile_field("walkable")
 
     @property
     def gamemap(self) -> GameMap:
@@ -41,34 +121,173 @@ class GameMap:
 
     @property
     def actors(self) -> Iterator[Actor]:
-        yield from (
-            entity
-            for entity in self.entities
-            if isinstance(entity, Actor) and entity.is_alive
-        )
+        # a copy, actors may die or spawn while the caller loops
+        yield from list(self.live_actors.actors)
 
     @property
     def items(self) -> Iterator[Item]:
         yield from (entity for entity in self.entities if isinstance(entity, Item))
 
+    def add_entity(self, entity: Entity) -> None:
+        self.entities.add(entity)
+        self.entity_locations.setdefault((entity.x, entity.y), set()).add(entity)
+        self.occupied[entity.x, entity.y] = True
+        bisect.insort(
+            self.render_list, entity, key=lambda other: other.render_order.value
+        )
+        if isinstance(entity, Actor):
+            self.scheduler.add(entity)
+            if entity.is_alive:
+                self.live_actors.add(entity)
+        if entity.blocks_movement:
+            self.blocker_changed(entity.x, entity.y)
+
+    def spawn_many(self, prototype: T, positions: Iterable[Tuple[int, int]]) -> List[T]:
+        # places a clone of the prototype on every position in one go,
+        # the draw list is re-sorted once instead of an insort per clone
+        spawned = []
+        for x, y in positions:
+            clone = prototype.clone()
+            clone.x = x
+            clone.y = y
+            clone.parent = self
+            self.entity_locations.setdefault((x, y), set()).add(clone)
+            self.occupied[x, y] = True
+            if clone.blocks_movement:
+                self.blocker_changed(x, y)
+            spawned.append(clone)
+        self.entities.update(spawned)
+        if isinstance(prototype, Actor):
+            for clone in spawned:
+                self.scheduler.add(clone)
+                if clone.is_alive:
+                    self.live_actors.add(clone)
+        self.render_list.extend(spawned)
+        # sort is stable and the list is two sorted runs, so this is a merge
+        self.render_list.sort(key=lambda other: other.render_order.value)
+        return spawned
+
+    def find_free_tiles(self, x: int, y: int, count: int) -> List[Tuple[int, int]]:
+        # the `count` walkable tiles without a blocking entity closest to x, y
+        # nearest first, fewer if the map doesn't have that many free tiles
+        xs, ys = np.nonzero(self.movement_cost() == 1)
+        distance = (xs - x) ** 2 + (ys - y) ** 2
+        nearest = np.argsort(distance, kind="stable")[:count]
+        return list(zip(xs[nearest].tolist(), ys[nearest].tolist()))
+
+    def remove_entity(self, entity: Entity) -> None:
+        self.entities.remove(entity)
+        self._unindex(entity, entity.x, entity.y)
+        self.render_list.remove(entity)
+        if isinstance(entity, Actor):
+            self.scheduler.discard(entity)
+            self.live_actors.discard(entity)
+        if entity.blocks_movement:
+            self.blocker_changed(entity.x, entity.y)
+
+    def change_render_order(self, entity: Entity, render_order: RenderOrder) -> None:
+        self.render_list.remove(entity)
+        entity.render_order = render_order
+        bisect.insort(
+            self.render_list, entity, key=lambda other: other.render_order.value
+        )
+
+    def move_entity(self, entity: Entity, old_x: int, old_y: int) -> None:
+        # called after the entity changed its coordinates
+        self._unindex(entity, old_x, old_y)
+        self.entity_locations.setdefault((entity.x, entity.y), set()).add(entity)
+        self.occupied[entity.x, entity.y] = True
+        if isinstance(entity, Actor):
+            # a dormant actor that is pushed around is bucketed by its old spot
+            self.scheduler.wake(entity)
+            self.live_actors.move(entity)
+        if entity.blocks_movement:
+            self.blocker_changed(old_x, old_y)
+            self.blocker_changed(entity.x, entity.y)
+
+    def blocker_changed(self, x: int, y: int) -> None:
+        self.blocker_changes.append((x, y))
+        self.blocker_version += 1
+        if self.cost is not None:
+            self.update_cost(x, y)
+
+    def blocker_changes_since(self, version: int) -> Optional[List[Tuple[int, int]]]:
+        # the tiles that changed after `version`, None if they are no longer
+        # all remembered
+        count = self.blocker_version - version
+        if count > len(self.blocker_changes):
+            return None
+        return list(self.blocker_changes)[len(self.blocker_changes) - count :]
+
+    def _unindex(self, entity: Entity, x: int, y: int) -> None:
+        bucket = self.entity_locations.get((x, y))
+        if bucket is None:
+            return
+        bucket.discard(entity)
+        if not bucket:
+            del self.entity_locations[(x, y)]
+            self.occupied[x, y] = False
+
+    def get_entities_at_location(self, x: int, y: int) -> Set[Entity]:
+        return self.entity_locations.get((x, y), set())
+
     def get_blocking_entity_at_location(
         self, location_X: int, location_y: int
     ) -> Optional[Entity]:
-        for entity in self.entities:
-            if (
-                entity.blocks_movement
-                and entity.x == location_X
-                and entity.y == location_y
-            ):
+        for entity in self.get_entities_at_location(location_X, location_y):
+            if entity.blocks_movement:
                 return entity
         return None
 
     def get_actor_at_location(self, x: int, y: int) -> Optional[Actor]:
-        for actor in self.actors:
-            if actor.x == x and actor.y == y:
-                return actor
+        for entity in self.get_entities_at_location(x, y):
+            if isinstance(entity, Actor) and entity.is_alive:
+                return entity
         return None
 
+    def movement_cost(self) -> np.ndarray:
+        # walkable tiles cost 1, tiles with a blocking entity are avoided
+        # the grid is built on the first search and then kept up to date
+        # by blocker_changed, don't write to it
+        if self.cost is None:
+            self.cost = np.asfortranarray(self.walkable, dtype=np.int8)
+            for x, y in self.entity_locations:
+                self.update_cost(x, y)
+        return self.cost
+
+    def update_cost(self, x: int, y: int) -> None:
+        if not self.cost[x, y]:
+            # not walkable
+            return
+        blockers = sum(
+            entity.blocks_movement for entity in self.get_entities_at_location(x, y)
+        )
+        # +10 for every blocker, capped so the int8 doesn't overflow
+        self.cost[x, y] = 1 + 10 * min(blockers, 12)
+
+    def area_damage(self, center: Tuple[int, int], radius: int, damage: int) -> bool:
+        # burns every actor within radius of center, all of them take the
+        # damage at once and the dead die afterwards. False if nobody was hit.
+        x, y = center
+        live_actors = self.live_actors
+        slots = live_actors.within(x, y, radius)
+        if not len(slots):
+            return False
+        victims = [live_actors.actors[slot] for slot in slots.tolist()]
+        damage_taken = live_actors.take_damage(slots, damage)
+        # loud enough to be heard around every victim
+        self.make_noise(x, y, NOISE_RADIUS + radius)
+        for actor, taken in zip(victims, damage_taken.tolist()):
+            self.engine.message_log.add_message(
+                f"{actor.name} explodes in fire taking {taken} HP"
+            )
+        live_actors.sweep_dead()
+        return True
+
+    def make_noise(self, x: int, y: int, radius: int = NOISE_RADIUS) -> None:
+        # wakes the dormant actors that can hear something happening at x, y
+        self.scheduler.wake_near(x, y, radius)
+
     def in_bounds(self, x: int, y: int) -> bool:
         # returns true if give x and y are within the maps boundaries
         return 0 <= x < self.width and 0 <= y < self.height
@@ -78,22 +297,26 @@ class GameMap:
         o_x, o_y, e_x, e_y = self.get_viewport()
         s_x = slice(o_x, e_x + 1)
         s_y = slice(o_y, e_y + 1)
-        viewport_tiles = self.tiles[s_x, s_y]  # [o_x:e_x+1,o_y:e_y + 1]
-        viewport_visible = self.visible[s_x, s_y]
-        viewport_explored = self.explored[s_x, s_y]
+        # the tile layer only changes when the viewport moves or the fov changes
+        cache_key = (o_x, o_y, e_x, e_y, self.fov_version)
+        if self.viewport_cache_key != cache_key:
+            viewport_visible = self.visible[s_x, s_y]
+            viewport_explored = self.explored[s_x, s_y]
+            self.viewport_cache = np.select(
+                condlist=[viewport_visible, viewport_explored],
+                choicelist=[
+                    self.tile_field("light", (s_x, s_y)),
+                    self.tile_field("dark", (s_x, s_y)),
+                ],
+                default=tile_types.SHROUD,
+            )
+            self.viewport_cache_key = cache_key
 
         console.rgb[
             0 : self.engine.game_world.viewport_width,
             0 : self.engine.game_world.viewport_height,
-        ] = np.select(
-            condlist=[viewport_visible, viewport_explored],
-            choicelist=[viewport_tiles["light"], viewport_tiles["dark"]],
-            default=tile_types.SHROUD,
-        )
-        entities_sorted_for_rendering = sorted(
-            self.entities, key=lambda x: x.render_order.value
-        )
-        for entity in entities_sorted_for_rendering:
+        ] = self.viewport_cache
+        for entity in self.render_list:
             if self.visible[entity.x, entity.y]:
                 console.print(
                     x=entity.x - o_x,
@@ -133,6 +356,9 @@ class GameMap:
 
 
 class GameWorld:
+    _executor: Optional[ThreadPoolExecutor] = None
+    _next_floor: Optional[Tuple[int, Future[GameMap]]] = None
+
     def __init__(
         self,
         engine: Engine,
@@ -144,9 +370,15 @@ class GameWorld:
         current_floor: int = -1,
         viewport_width: int = 0,
         viewport_height: int = 0,
+        seed: Optional[int] = None,
     ):
         self.engine = engine
 
+        # every floor of the run is derived from this seed
+        if seed is None:
+            seed = random.getrandbits(32)
+        self.seed = seed
+
         self.viewport_width = viewport_width
         self.viewport_height = viewport_height
 
@@ -160,50 +392,99 @@ class GameWorld:
 
         self.current_floor = current_floor
 
+    def __getstate__(self) -> dict:
+        # the worker and the floor it is building can't be pickled,
+        # after loading the next floor is generated on the spot
+        state = self.__dict__.copy()
+        state["_executor"] = None
+        state["_next_floor"] = None
+        return state
+
     def generate_floor(self) -> None:
-        from procgen import generate_dungeon
         from procgen import generate_class_select
+
+        self.current_floor += 1
+        if self.current_floor == 0:
+            game_map = generate_class_select(
+                map_width=self.map_width, map_height=self.map_height, engine=self.engine
+            )
+        else:
+            game_map = self.take_pregenerated_floor()
+            if game_map is None:
+                game_map = self.build_floor(self.current_floor)
+        self.enter_floor(game_map)
+        self.pregenerate_next_floor()
+
+    def enter_floor(self, game_map: GameMap) -> None:
+        self.engine.player.place(*game_map.player_start, game_map)
+        self.engine.game_map = game_map
+        if game_map.arrival_message:
+            self.engine.message_log.add_message(game_map.arrival_message)
+
+    def pregenerate_next_floor(self) -> None:
+        # builds the next floor on a worker thread while the current one is played
+        # the class select floor is skipped since the loot depends on the chosen class
+        if self.current_floor < 1:
+            return
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1)
+        next_floor = self.current_floor + 1
+        self._next_floor = (
+            next_floor,
+            self._executor.submit(self.build_floor, next_floor),
+        )
+
+    def take_pregenerated_floor(self) -> Optional[GameMap]:
+        if self._next_floor is None:
+            return None
+        floor_number, future = self._next_floor
+        self._next_floor = None
+        if floor_number != self.current_floor:
+            # the floor was changed some other way (cheats), the result is useless
+            future.cancel()
+            return None
+        if not future.done() and future.cancel():
+            # the worker never started on it, building it here is just as fast
+            return None
+        return future.result()
+
+    def build_floor(self, floor_number: int) -> GameMap:
+        from procgen import generate_dungeon
         from procgen import generate_shop_room
         from procgen import generate_boss_room
+        from procgen import floor_rng
 
-        self.current_floor += 1
-        shop_chance = random.randint(0, 100)
+        shop_chance = floor_rng(self.seed, floor_number, "floor_type").randint(0, 100)
         # self.randSizes()
         # Small description
-        # Check if floor is 0 for character creation room
         # if shop is rolled and its not the first floor or a floor number divisibile by 5 a shop room gets spawned
         # if floor number is increment of 5 spawn a boss fight
         # if not any of the above gen a normal floor
-        if self.current_floor == 0:
-            self.engine.game_map = generate_class_select(
-                map_width=self.map_width, map_height=self.map_height, engine=self.engine
-            )
-        elif (
-            shop_chance <= 20
-            and not self.current_floor == 1
-            and not self.current_floor % 5 == 0
-        ):
-            self.engine.game_map = generate_shop_room(
+        if shop_chance <= 20 and not floor_number == 1 and not floor_number % 5 == 0:
+            return generate_shop_room(
                 map_width=self.map_width,
                 map_height=self.map_height,
                 engine=self.engine,
-                current_floor=self.current_floor,
+                current_floor=floor_number,
+                seed=self.seed,
             )
-        elif self.current_floor % 5 == 0:
-            self.engine.game_map = generate_boss_room(
+        elif floor_number % 5 == 0:
+            return generate_boss_room(
                 map_width=self.map_width,
                 map_height=self.map_height,
                 engine=self.engine,
-                current_floor=self.current_floor,
+                current_floor=floor_number,
             )
         else:
-            self.engine.game_map = generate_dungeon(
+            return generate_dungeon(
                 max_rooms=self.max_rooms,
                 room_min_size=self.room_min_size,
                 room_max_size=self.room_max_size,
                 map_width=self.map_width,
                 map_height=self.map_height,
                 engine=self.engine,
+                current_floor=floor_number,
+                seed=self.seed,
             )
 
     def randSizes(self):
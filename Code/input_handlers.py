@@ -1,7 +1,5 @@
 from __future__ import annotations
 import math
-import os
-import copy
 from typing import Optional, TYPE_CHECKING, Tuple, Callable, Union
 import tcod
 import actions
@@ -16,8 +14,10 @@ from components.settings import (
     GENERAL_CHEATS,
     GENERAL_CHEAT_ACTIVATIONS,
     PlayerClass,
+    SAVE_FILE,
 )
 import components.affix as affix
+import save_files
 
 # from procgen import item_chances, enemy_chances
 # from components.procgen_chances import item_chances
@@ -145,8 +145,9 @@ class EventHandler(BaseEventHandler):
         except exceptions.Impossible as exc:
             self.engine.message_log.add_message(exc.args[0], color.impossible)
             return False  # Skip enemy turn on exceptions.
-        self.engine.handle_enemy_turns()
+        self.engine.handle_enemy_turns(action.cost)
         self.engine.update_fov()
+        self.engine.autosaver.tick(self.engine)
         return True
 
     def ev_mousemotion(self, event: tcod.event.MouseMotion) -> None:
@@ -638,7 +639,7 @@ class ShopActivateHandler(ShopHandler):
         )
         real_price = int(real_price)
         if self.engine.player.currency >= item.price:
-            i_tem = copy.deepcopy(item)
+            i_tem = item.clone()
 
             i_tem.parent = self.engine.player.inventory
             self.engine.player.inventory.items.append(i_tem)
@@ -811,16 +812,14 @@ class MainGameEventHandler(EventHandler):
             c_event = get_event_by_id(movement_id)
             if c_event["ID"] in MOVE_KEYS and key == c_event["KEY"]:
                 dx, dy = MOVE_KEYS[c_event["ID"]]
-                # if player ist rouge they can sprint this consumes stamina. in order to sprint the input is multiplied by 2
+                # if player ist rouge they can sprint this consumes stamina. a sprint takes half the time of a normal move
                 if (
                     self.engine.player.player_class == PlayerClass.ROUGE
                     and tcod.event.Modifier(c_event["MOD"]) in modifier
                     and self.engine.player.fighter.stamina >= 2
                 ):
-                    dx = dx * 2
-                    dy = dy * 2
-                    # stamina is now handlede by the bump action
-                    # self.engine.player.fighter.stamina -= 2
+                    # stamina is handled by the bump action
+                    return BumpAction(player, dx, dy, sprint=True)
                 elif (
                     self.engine.player.fighter.stamina
                     < self.engine.player.fighter.max_stamina
@@ -885,6 +884,8 @@ class MainGameEventHandler(EventHandler):
             return GerneralCheatActivationActiveHandler(self.engine)
         elif key == tcod.event.KeySym.F5 and CHEATS:
             return AffixCheatActiveHandler(self.engine)
+        elif key == tcod.event.KeySym.F6 and CHEATS:
+            return AutosaveMetricsScreen(self.engine)
         # No valid key was pressed
         # action = None
         return action
@@ -892,8 +893,9 @@ class MainGameEventHandler(EventHandler):
 
 class GameOverEventHandler(EventHandler):
     def on_quit(self) -> None:
-        if os.path.exists("savegame.sav"):
-            os.remove("savegame.sav")
+        # an autosave still in flight would bring the save back
+        self.engine.autosaver.wait()
+        save_files.delete_save(SAVE_FILE)
         raise exceptions.QuitWithoutSaving()
 
     def ev_quit(self, event):
@@ -1243,11 +1245,14 @@ class GerneralCheatActivationActiveHandler(GeneralCheatsActivaions):
 
         match cheat:
             case "spawn_shop":
-                self.engine.game_map = generate_shop_room(
-                    engine=self.engine,
-                    map_width=100,
-                    map_height=100,
-                    current_floor=self.engine.game_world.current_floor,
+                self.engine.game_world.enter_floor(
+                    generate_shop_room(
+                        engine=self.engine,
+                        map_width=100,
+                        map_height=100,
+                        current_floor=self.engine.game_world.current_floor,
+                        seed=self.engine.game_world.seed,
+                    )
                 )
             case "current_floor_+":
                 self.engine.game_world.current_floor += 1
@@ -1262,6 +1267,27 @@ class GerneralCheatActivationActiveHandler(GeneralCheatsActivaions):
                 self.engine.player.fighter.die()
 
 
+class AutosaveMetricsScreen(AskUserEventHandler):
+    TITLE = "Autosave"
+
+    def on_render(self, console):
+        super().on_render(console)
+        metrics = self.engine.autosaver.metrics
+        width = 30
+        console.draw_frame(
+            x=0,
+            y=0,
+            width=width,
+            height=len(metrics) + 2,
+            title=self.TITLE,
+            clear=True,
+            fg=(255, 255, 255),
+            bg=(0, 0, 0),
+        )
+        for i, (name, value) in enumerate(metrics.items()):
+            console.print(1, i + 1, f"{name:<12}: {round(value, 1)}")
+
+
 class AffixCheatScreen(AskUserEventHandler):
     TITLE = "Affix cheats"
 
@@ -6,6 +6,7 @@ import exceptions
 import input_handlers
 
 from components.tileset import get_tileset
+from components.settings import SAVE_FILE
 
 import setup_game
 
@@ -57,10 +58,10 @@ def main() -> None:
         except exceptions.QuitWithoutSaving:
             raise
         except SystemExit:  # Save and quit.
-            save_game(handler, "savegame.sav")
+            save_game(handler, SAVE_FILE)
             raise
         except BaseException:  # Save on any other unexpected exception.
-            save_game(handler, "savegame.sav")
+            save_game(handler, SAVE_FILE)
             raise
 
 
@@ -1,14 +1,15 @@
 from __future__ import annotations
 from typing import Tuple, List, Iterator, Dict, TYPE_CHECKING, Optional, cast
-from components.settings import PlayerClass
+from components.settings import FLOOR_CACHE_DIR, PlayerClass
+from components.floor_cache import FloorCache
 
 from entity import Actor, Item
 from components.perlin import build_map_new
 from game_map import GameMap
 import tile_types
 import tcod
-import copy
 import entity_factory
+import numpy as np
 import random
 
 
@@ -218,12 +219,20 @@ enemy_chances: Dict[int, List[Tuple[Entity, int]]] = {
     ],
 }
 
+floor_cache = FloorCache(FLOOR_CACHE_DIR) if FLOOR_CACHE_DIR else None
+
 boss_dict = {
     5: entity_factory.vicera_abomination,
     10: entity_factory.bloated_corpse_fly,
 }
 
 
+def floor_rng(seed: int, floor: int, stream: str) -> random.Random:
+    # every floor gets its own random streams derived from the run seed
+    # so a floor can be rebuilt without replaying the floors before it
+    return random.Random(f"{seed}:{floor}:{stream}")
+
+
 def get_max_value_for_floor(
     max_value_by_floor: List[Tuple[int, int]], floor: int
 ) -> int:
@@ -238,40 +247,72 @@ def get_max_value_for_floor(
     return current_value
 
 
+class WeightedTable:
+    # the entities a chance table allows on a floor and their cumulative
+    # weights, sampling is a binary search per pick
+    def __init__(self, entities: List[Entity], weights: List[int]):
+        self.entities = entities
+        self.cumulative = np.cumsum(weights)
+
+    def sample(self, k: int, rng: random.Random) -> List[Entity]:
+        if k <= 0 or not self.entities:
+            return []
+        # the picks use the floor stream so floors stay reproducible
+        targets = np.array([rng.random() for _ in range(k)]) * self.cumulative[-1]
+        picks = np.searchsorted(self.cumulative, targets, side="right")
+        return [self.entities[index] for index in picks.tolist()]
+
+
+# compiled tables by (chance table, floor tier), a tier is the highest
+# floor key of a chance table that is not above the floor
+_weighted_tables: Dict[Tuple[int, int], WeightedTable] = {}
+
+
+def get_weighted_table(
+    weighted_chances_by_floor: Dict[int, List[Tuple[Entity, int]]], floor: int
+) -> WeightedTable:
+    tier = max((key for key in weighted_chances_by_floor if key <= floor), default=-1)
+    table = _weighted_tables.get((id(weighted_chances_by_floor), tier))
+    if table is None:
+        entity_weighted_chances = {}
+        for key, values in weighted_chances_by_floor.items():
+            if key > tier:
+                break
+            else:
+                for value in values:
+                    entity = value[0]
+                    weighted_chance = value[1]
+                    entity_weighted_chances[entity] = weighted_chance
+
+        table = WeightedTable(
+            list(entity_weighted_chances.keys()),
+            list(entity_weighted_chances.values()),
+        )
+        _weighted_tables[(id(weighted_chances_by_floor), tier)] = table
+    return table
+
+
 def get_entities_at_random(
     weighted_chances_by_floor: Dict[int, List[Tuple[Entity, int]]],
     number_of_entities: int,
     floor: int,
+    rng: random.Random,
 ) -> List[Entity]:
-    entity_weighted_chances = {}
-    for key, values in weighted_chances_by_floor.items():
-        if key > floor:
-            break
-        else:
-            for value in values:
-                entity = value[0]
-                weighted_chance = value[1]
-                entity_weighted_chances[entity] = weighted_chance
-
-    entities = list(entity_weighted_chances.keys())
-    entity_weighted_chance_values = list(entity_weighted_chances.values())
-    chosen_entities = random.choices(
-        entities, weights=entity_weighted_chance_values, k=number_of_entities
+    return get_weighted_table(weighted_chances_by_floor, floor).sample(
+        number_of_entities, rng
     )
 
-    return chosen_entities
-
 
 # Rewrote so that entity is cast to actor to appease the linter
-def generate_shop_items(entity: Entity, floor_number: int):
+def generate_shop_items(entity: Entity, floor_number: int, rng: random.Random):
     if hasattr(entity, "inventory"):
         actor = cast(Actor, entity)
         if actor.inventory.capacity > 0:
             items: List[Entity] = get_entities_at_random(
-                item_chances, actor.inventory.capacity, floor_number
+                item_chances, actor.inventory.capacity, floor_number, rng
             )
             for item in items:
-                l_hp = copy.deepcopy(cast(Item, item))
+                l_hp = cast(Item, item).clone()
 
                 l_hp.parent = actor.inventory
                 actor.inventory.items.append(l_hp)
@@ -295,6 +336,31 @@ class RectangularRoom:
     def inner(self) -> tuple[slice, slice]:
         return slice(self.x1 + 1, self.x2), slice(self.y1 + 1, self.y2)
 
+    def shape_mask(self, room_type: str, rng: random.Random) -> np.ndarray:
+        # boolean mask over the inner slice, True where the room is floor
+        slice_x, slice_y = self.inner
+        size = (slice_x.stop - slice_x.start, slice_y.stop - slice_y.start)
+        x, y = np.ogrid[slice_x, slice_y]
+        cx, cy = self.center
+        if room_type == "circle":
+            r = rng.randint(5, 20)
+            return (x - cx) ** 2 + (y - cy) ** 2 <= r * r
+        if room_type == "ellipse":
+            a = max(size[0] / 2, 1)
+            b = max(size[1] / 2, 1)
+            return ((x - cx) / a) ** 2 + ((y - cy) / b) ** 2 <= 1
+        if room_type == "blob":
+            # a cavern made of a few overlapping circles
+            mask = np.zeros(size, dtype=bool)
+            max_r = max(2, min(size) // 2)
+            for _ in range(rng.randint(3, 5)):
+                bx = rng.randint(slice_x.start, slice_x.stop - 1)
+                by = rng.randint(slice_y.start, slice_y.stop - 1)
+                r = rng.randint(2, max_r)
+                mask |= (x - bx) ** 2 + (y - by) ** 2 <= r * r
+            return mask
+        return np.ones(size, dtype=bool)
+
     def intersects(self, other: RectangularRoom) -> bool:
         # this checks if 2 rooms would intersect
         # it does this by comparing coordinates
@@ -312,55 +378,63 @@ def place_entities(
     room: RectangularRoom,
     dungeon: GameMap,
     floor_number: int,
+    rng: random.Random,
     boss: Optional[bool] = False,
     current_room: Optional[int] = 0,
 ) -> None:
     # choose random number of monsters and items
     monsters = []
     if not current_room == 0:
-        number_of_monsters = random.randint(
+        number_of_monsters = rng.randint(
             0, get_max_value_for_floor(max_monsters_by_floor, floor_number)
         )
         monsters: List[Entity] = get_entities_at_random(
-            enemy_chances, number_of_monsters, floor_number
+            enemy_chances, number_of_monsters, floor_number, rng
         )
-    number_of_items = random.randint(
+    number_of_items = rng.randint(
         0, get_max_value_for_floor(max_items_by_floor, floor_number)
     )
     items: List[Entity] = get_entities_at_random(
-        item_chances, number_of_items, floor_number
+        item_chances, number_of_items, floor_number, rng
     )
-    for entity in monsters + items:
-        x = random.randint(room.x1 + 1, room.x2 - 1)
-        y = random.randint(room.y1 + 1, room.y2 - 1)
-        if not any(entity.x == x and entity.y == y for entity in dungeon.entities):
-            if (
-                "Mana" in entity.name
-                and not dungeon.engine.player.player_class == PlayerClass.MAGE
-            ):
-                entity_factory.health_potion.spawn(dungeon, x, y)
-                continue
-            if "Organ" in entity.name and dungeon.vendor_spawned:
-                entity_factory.orc.spawn(dungeon, x, y)
-                continue
-            else:
-                generate_shop_items(entity=entity, floor_number=floor_number)
-                dungeon.vendor_spawned = True
-            entity.spawn(dungeon, x, y)
-    if floor_number == 5 and boss:
-        entity_factory.lvl5_boss.spawn(
-            dungeon,
-            random.randint(room.x1 + 1, room.x2 - 1),
-            random.randint(room.y1 + 1, room.y2 - 1),
-        )
+    entities = monsters + items
+    spawn_boss = floor_number == 5 and boss
+
+    # every entity gets its own free floor tile of the room,
+    # if the room is too small the last ones are left out
+    free_x, free_y = np.nonzero(
+        dungeon.tile_field("walkable", room.inner) & ~dungeon.occupied[room.inner]
+    )
+    picks = rng.sample(
+        range(len(free_x)), min(len(entities) + spawn_boss, len(free_x))
+    )
+    left, top = room.inner[0].start, room.inner[1].start
+    positions = [(left + int(free_x[pick]), top + int(free_y[pick])) for pick in picks]
+    if spawn_boss and positions:
+        # the boss goes first so it always gets a tile
+        entity_factory.lvl5_boss.spawn(dungeon, *positions.pop(0))
+    for entity, (x, y) in zip(entities, positions):
+        if (
+            "Mana" in entity.name
+            and not dungeon.engine.player.player_class == PlayerClass.MAGE
+        ):
+            entity_factory.health_potion.spawn(dungeon, x, y)
+            continue
+        if "Organ" in entity.name and dungeon.vendor_spawned:
+            entity_factory.orc.spawn(dungeon, x, y)
+            continue
+        else:
+            generate_shop_items(entity=entity, floor_number=floor_number, rng=rng)
+            dungeon.vendor_spawned = True
+        entity.spawn(dungeon, x, y)
 
 
 def tunnel_between(
-    start: Tuple[int, int], end: Tuple[int, int]
+    start: Tuple[int, int], end: Tuple[int, int], rng: random.Random
 ) -> Iterator[Tuple[int, int]]:
     x1, y1 = start
     x2, y2 = end
-    if random.random() < 0.5:
+    if rng.random() < 0.5:
         corner_x, corner_y = x2, y1
     else:
         corner_x, corner_y = x1, y2
@@ -381,39 +455,85 @@ def generate_dungeon(
     map_width: int,  # width of map
     map_height: int,  # height of map
     engine: Engine,
+    current_floor: int,
+    seed: int,  # seed of the run, the floor streams are derived from it
 ) -> GameMap:
+    # create new dungeon
+    dungeon = GameMap(engine, map_width, map_height)
+
+    # the layout comes from the cache if this floor was built before
+    cache_key = (
+        seed,
+        current_floor,
+        map_width,
+        map_height,
+        max_rooms,
+        room_min_size,
+        room_max_size,
+    )
+    cached = floor_cache.load(cache_key) if floor_cache else None
+    if cached:
+        tile_ids, corners = cached
+        dungeon.tile_ids[:] = tile_ids
+        rooms = [RectangularRoom(x1, y1, x2 - x1, y2 - y1) for x1, y1, x2, y2 in corners]
+    else:
+        rooms = carve_rooms(
+            dungeon,
+            max_rooms,
+            room_min_size,
+            room_max_size,
+            floor_rng(seed, current_floor, "layout"),
+        )
+        if floor_cache:
+            floor_cache.save(
+                cache_key,
+                dungeon.tile_ids,
+                [(room.x1, room.y1, room.x2, room.y2) for room in rooms],
+            )
 
-    map = build_map_new(shape=(map_height, map_width))
+    # player starts in the first room, the stairs are in the last one
+    dungeon.player_start = rooms[0].center
+    dungeon.upstairs_location = rooms[-1].center
+
+    rng = floor_rng(seed, current_floor, "population")
+    for index, room in enumerate(rooms):
+        # the seventh room is the one that may hold a boss
+        place_entities(room, dungeon, current_floor, rng, index == 6, index)
+    return dungeon
+
+
+def carve_rooms(
+    dungeon: GameMap,
+    max_rooms: int,
+    room_min_size: int,
+    room_max_size: int,
+    rng: random.Random,
+) -> List[RectangularRoom]:
+    # carves cave noise, rooms and tunnels into the dungeon tiles
+    # and returns the rooms that were built
+    floor_mask = build_map_new(
+        shape=(dungeon.width, dungeon.height), seed=rng.getrandbits(32)
+    )
+    dungeon.tile_ids[floor_mask] = tile_types.randFloorId(int(floor_mask.sum()), rng)
 
-    # create new dungeon
-    player = engine.player
-    dungeon = GameMap(engine, map_width, map_height, entities=[player])
     # this is a runnning list of all the rooms generated
     rooms: List[RectangularRoom] = []
     center_of_last_room = (0, 0)
-    # is_last_room = False
     # iterate from 0 to max_rooms
     room_check = 0
-    boss = False
-    boss_count = 0
-
-    for x in range(map_height):
-        for y in range(map_width):
-            if map[x][y] < 20:
-                dungeon.tiles[y - 1, x - 1] = tile_types.randFloor()
 
     for r in range(max_rooms):
         # randomly generate the size of the room
-        room_width = random.randint(room_min_size, room_max_size)
-        room_height = random.randint(room_min_size, room_max_size)
+        room_width = rng.randint(room_min_size, room_max_size)
+        room_height = rng.randint(room_min_size, room_max_size)
 
         # randomly get the position of the room
-        x = random.randint(0, dungeon.width - room_width - 1)
-        y = random.randint(0, dungeon.height - room_height - 1)
+        x = rng.randint(0, dungeon.width - room_width - 1)
+        y = rng.randint(0, dungeon.height - room_height - 1)
         # creates the rect room
         new_room = RectangularRoom(x, y, room_width, room_height)
         # check if current room intersects with other room already generated
-        room_type = random.choice(["rect", "circle"])
+        room_type = rng.choice(["rect", "circle", "ellipse", "blob"])
 
         if len(rooms) == 0:
             room_type = "rect"
@@ -424,47 +544,27 @@ def generate_dungeon(
             continue
             # set tiles of room innter as floor
 
+        # the inner slice is a view, so the masked assignment carves the map
+        room_mask = new_room.shape_mask(room_type, rng)
+        dungeon.tile_ids[new_room.inner][room_mask] = tile_types.randFloorId(
+            int(room_mask.sum()), rng
+        )
         if room_type == "rect":
-            dungeon.tiles[new_room.inner] = tile_types.randFloor()
             center_of_last_room = new_room.center
-        else:
-            slice_x, slice_y = new_room.inner
-            cx, cy = new_room.center
-            r = random.randint(5, 20)
-
-            for x in range(slice_x.start, slice_x.stop):
-                for y in range(slice_y.start, slice_y.stop):
-                    dx = x - cx
-                    dy = y - cy
-                    if dx * dx + dy * dy <= r * r:
-                        # make this tile floor
-                        if x >= engine.game_world.map_height:
-                            x = engine.game_world.map_height - 1
-                        if y >= engine.game_world.map_width:
-                            y = engine.game_world.map_width - 1
-                        dungeon.tiles[y, x] = tile_types.randFloor()
-        # this checks for first room if so player is placed in it
-        if len(rooms) == 0:
-            player.place(*new_room.center, dungeon)
-        else:
+        if len(rooms) > 0:
             # now tunnels are built
             # with negative index to get previos room
-            for x, y in tunnel_between(rooms[-1].center, new_room.center):
-                dungeon.tiles[x, y] = tile_types.randFloor()
+            tunnel = np.array(
+                list(tunnel_between(rooms[-1].center, new_room.center, rng))
+            ).reshape(-1, 2)
+            dungeon.tile_ids[tunnel[:, 0], tunnel[:, 1]] = tile_types.randFloorId(
+                len(tunnel), rng
+            )
             center_of_last_room = new_room.center
-        if len(rooms) >= 6 and not boss and boss_count == 0:
-            boss_count = 1
-            boss = True
-        elif boss_count > 0:
-            boss = False
-        place_entities(
-            new_room, dungeon, engine.game_world.current_floor, boss, len(rooms)
-        )
-        dungeon.tiles[center_of_last_room] = tile_types.stairs_up
-        dungeon.upstairs_location = center_of_last_room
+        dungeon.tile_ids[center_of_last_room] = tile_types.STAIRS_UP
         # room is build sucessfully and appended
         rooms.append(new_room)
-    return dungeon
+    return rooms
 
 
 def generate_class_select(
@@ -477,22 +577,21 @@ def generate_class_select(
     room_width = 10
     room_height = 10
     # create new dungeon
-    player = engine.player
-    dungeon = GameMap(engine, map_width, map_height, entities=[player])
+    dungeon = GameMap(engine, map_width, map_height)
     # center this room
     y = engine.game_world.map_height // 4
     x = engine.game_world.map_width // 4
     # creates the rect room
     new_room = RectangularRoom(x, y, room_width, room_height)
 
-    dungeon.tiles[new_room.inner] = tile_types.randFloor()
+    dungeon.tile_ids[new_room.inner] = tile_types.randFloorId()
 
-    player.place(*new_room.center, dungeon)
+    dungeon.player_start = center_x, center_y = new_room.center
 
-    entity_factory.gorebound.spawn(dungeon, player.x - 2, player.y - 2)
-    entity_factory.helixbound.spawn(dungeon, player.x + 2, player.y - 2)
-    dungeon.tiles[new_room.center] = tile_types.stairs_up
-    engine.message_log.add_message(
+    entity_factory.gorebound.spawn(dungeon, center_x - 2, center_y - 2)
+    entity_factory.helixbound.spawn(dungeon, center_x + 2, center_y - 2)
+    dungeon.tile_ids[new_room.center] = tile_types.STAIRS_UP
+    dungeon.arrival_message = (
         "Choose you're class by consuming a the remains before you. Or don't and stay a rouge"
     )
     dungeon.upstairs_location = new_room.center
@@ -504,29 +603,33 @@ def generate_shop_room(
     map_width: int,  # width of map
     map_height: int,
     current_floor: int,
+    seed: int,
 ) -> GameMap:
     room_width = 10
     room_height = 10
     # create new dungeon
-    player = engine.player
-    dungeon = GameMap(engine, map_width, map_height, entities=[player])
+    dungeon = GameMap(engine, map_width, map_height)
     y = engine.game_world.map_height // 4
     x = engine.game_world.map_width // 4
 
     # creates the rect room
     new_room = RectangularRoom(x, y, room_width, room_height)
 
-    dungeon.tiles[new_room.inner] = tile_types.randFloor()
+    dungeon.tile_ids[new_room.inner] = tile_types.randFloorId()
 
-    player.place(*new_room.center, dungeon)
+    dungeon.player_start = center_x, center_y = new_room.center
 
-    entity_factory.vendor.spawn(dungeon, player.x - 2, player.y - 2)
+    entity_factory.vendor.spawn(dungeon, center_x - 2, center_y - 2)
     for entity in dungeon.entities:
         if "Organ" in entity.name:
-            generate_shop_items(entity=entity, floor_number=current_floor)
+            generate_shop_items(
+                entity=entity,
+                floor_number=current_floor,
+                rng=floor_rng(seed, current_floor, "population"),
+            )
 
-    dungeon.tiles[new_room.center] = tile_types.stairs_up
-    engine.message_log.add_message("You sumble upon a humble merchant.")
+    dungeon.tile_ids[new_room.center] = tile_types.STAIRS_UP
+    dungeon.arrival_message = "You sumble upon a humble merchant."
     dungeon.upstairs_location = new_room.center
     return dungeon
 
@@ -544,19 +647,18 @@ def generate_boss_room(
     room_width = 30
     room_height = 30
     # create new dungeon
-    player = engine.player
-    dungeon = GameMap(engine, map_width, map_height, entities=[player])
+    dungeon = GameMap(engine, map_width, map_height)
     y = engine.game_world.map_height // 4
     x = engine.game_world.map_width // 4
 
     # creates the rect room
     new_room = RectangularRoom(x, y, room_width, room_height)
 
-    dungeon.tiles[new_room.inner] = tile_types.randFloor()
+    dungeon.tile_ids[new_room.inner] = tile_types.randFloorId()
 
-    player.place(*new_room.center, dungeon)
+    dungeon.player_start = center_x, center_y = new_room.center
 
-    boss_dict[current_floor].spawn(dungeon, player.x - 2, player.y - 2)
+    boss_dict[current_floor].spawn(dungeon, center_x - 2, center_y - 2)
 
     return dungeon
 
@@ -572,18 +674,16 @@ def generate_boss_room_empty(
     room_width = 30
     room_height = 30
     # create new dungeon
-    player = engine.player
-    dungeon = GameMap(engine, map_width, map_height, entities=[player])
+    dungeon = GameMap(engine, map_width, map_height)
     y = engine.game_world.map_height // 4
     x = engine.game_world.map_width // 4
 
     # creates the rect room
     new_room = RectangularRoom(x, y, room_width, room_height)
 
-    dungeon.tiles[new_room.inner] = tile_types.randFloor()
-    current_location = (current_x, current_y)
-    player.place(*current_location, dungeon)
+    dungeon.tile_ids[new_room.inner] = tile_types.randFloorId()
+    dungeon.player_start = (current_x, current_y)
 
-    dungeon.tiles[new_room.center] = tile_types.stairs_up
+    dungeon.tile_ids[new_room.center] = tile_types.STAIRS_UP
     dungeon.upstairs_location = new_room.center
     return dungeon
@@ -12,9 +12,7 @@ def get_names_at_location(x: int, y: int, game_map: GameMap) -> str:
     if not game_map.in_bounds(x, y) or not game_map.visible[int(x), int(y)]:
         return ""
     names = ", ".join(
-        entity.name
-        for entity in game_map.entities
-        if entity.x == int(x) and entity.y == int(y)
+        entity.name for entity in game_map.get_entities_at_location(int(x), int(y))
     )
 
     return names.capitalize()
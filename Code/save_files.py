@@ -0,0 +1,348 @@
+from __future__ import annotations
+
+import io
+import os
+import pickle
+import tempfile
+import time
+import traceback
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple, TYPE_CHECKING
+
+import file_codecs
+from exceptions import IncompatibleSave
+from message_log import Message, MessageLog
+
+if TYPE_CHECKING:
+    from engine import Engine
+
+# A save is split in three files so a save only writes what changed:
+#   <name>                   the engine without tiles and message log, small
+#                            and rewritten
+#   <name>.floor.<floor id>  the tile grid of the current floor, written once
+#                            per floor
+#   <name>.log.<journal id>  the message log as an append only journal of
+#                            (index, message), a new game starts a new one
+# The state file names the floor and journal it belongs to and is written
+# last, replacing it commits the save. Floors and journals it no longer names
+# are removed after that, so a crash at any point leaves a save that loads.
+# Saves in any other format, like the single lzma compressed pickle older
+# versions wrote, are from before the map and actor layout this game uses and
+# are rejected with IncompatibleSave instead of loading half working.
+# The floor and state files are compressed with the codec from the settings.
+
+SAVE_MAGIC = b"FTSAVE2\n"
+
+
+class SaveState:
+    # what was last written to (or read from) a save, so the next save
+    # knows which parts can be skipped. Only set once a write succeeded,
+    # a snapshot taken while an earlier one is still being written
+    # writes what that one writes again.
+    def __init__(
+        self,
+        floor_id: str,
+        journal_id: str,
+        message_log: MessageLog,
+        message_count: int,
+    ):
+        self.floor_id = floor_id
+        self.journal_id = journal_id
+        self.message_log = message_log
+        self.message_count = message_count
+
+
+_save_states: Dict[str, SaveState] = {}
+
+
+class _EnginePickler(pickle.Pickler):
+    # stores the static tile grid and the message log by reference
+    def __init__(self, file: io.BytesIO, engine: Engine, journal_id: str) -> None:
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.tiles = engine.game_map.tile_ids
+        self.floor_id = engine.game_map.floor_id
+        self.message_log = engine.message_log
+        self.journal_id = journal_id
+
+    def persistent_id(self, obj: Any) -> Optional[Tuple[str, Any]]:
+        if obj is self.tiles:
+            return ("tiles", self.floor_id)
+        if obj is self.message_log:
+            return ("message_log", (self.journal_id, len(self.message_log.messages)))
+        return None
+
+
+class _EngineUnpickler(pickle.Unpickler):
+    # reads the floor and journal the state names
+    def __init__(self, file: io.BytesIO, filename: str) -> None:
+        super().__init__(file)
+        self.filename = filename
+        self.floor_id = ""
+        self.journal_id = ""
+
+    def persistent_load(self, pid: Tuple[str, Any]) -> Any:
+        kind, value = pid
+        if kind == "tiles":
+            with open(_floor_path(self.filename, value), "rb") as f:
+                floor_id, tiles = pickle.loads(file_codecs.decode(f.read()))
+            if floor_id != value:
+                raise pickle.UnpicklingError("Floor file belongs to another save")
+            self.floor_id = floor_id
+            return tiles
+        if kind == "message_log":
+            journal_id, count = value
+            message_log = MessageLog()
+            message_log.messages = _read_journal(
+                _journal_path(self.filename, journal_id)
+            )[:count]
+            self.journal_id = journal_id
+            return message_log
+        raise pickle.UnpicklingError(f"Unknown reference {kind}")
+
+
+def _floor_path(filename: str, floor_id: str) -> str:
+    return f"{filename}.floor.{floor_id}"
+
+
+def _journal_path(filename: str, journal_id: str) -> str:
+    return f"{filename}.log.{journal_id}"
+
+
+def _read_journal(path: str) -> List[Message]:
+    messages: List[Message] = []
+    with open(path, "rb") as f:
+        while True:
+            try:
+                index, message = pickle.load(f)
+            except (EOFError, pickle.UnpicklingError):
+                # end of the journal or a record cut short by a crash
+                break
+            del messages[index:]
+            messages.append(message)
+    return messages
+
+
+def _save_files(filename: str) -> List[str]:
+    # every file of the save except the state file, including the
+    # floor and log of saves from before they were named by id
+    # filename has to be absolute, like every path of a snapshot
+    directory = os.path.dirname(filename)
+    base = os.path.basename(filename)
+    prefixes = (f"{base}.floor", f"{base}.log")
+    return [
+        os.path.join(directory, name)
+        for name in os.listdir(directory)
+        if name.startswith(prefixes)
+    ]
+
+
+def _write_atomic(filename: str, data: bytes) -> None:
+    directory = os.path.dirname(os.path.abspath(filename))
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    os.replace(temp_path, filename)
+
+
+class SaveSnapshot:
+    # everything a save writes, already pickled on the main thread
+    # compressing and writing it can then happen anywhere
+    def __init__(
+        self,
+        filename: str,
+        state: bytes,
+        floor_id: str,
+        floor: Optional[bytes],
+        journal_id: str,
+        journal: bytes,
+        new_journal: bool,
+        save_state: SaveState,
+    ) -> None:
+        self.filename = filename
+        self.state = state
+        self.floor_id = floor_id
+        self.floor = floor
+        self.journal_id = journal_id
+        self.journal = journal
+        self.new_journal = new_journal
+        # what the save holds once this is written
+        self.save_state = save_state
+
+    def write(self) -> int:
+        # returns the number of bytes written
+        size = 0
+        floor_path = _floor_path(self.filename, self.floor_id)
+        if self.floor is not None:
+            floor_data = file_codecs.encode(self.floor)
+            _write_atomic(floor_path, floor_data)
+            size += len(floor_data)
+
+        journal_path = _journal_path(self.filename, self.journal_id)
+        if self.new_journal:
+            _write_atomic(journal_path, self.journal)
+        else:
+            # records past the count in the state file are ignored on load
+            with open(journal_path, "ab") as f:
+                f.write(self.journal)
+        size += len(self.journal)
+
+        state_data = SAVE_MAGIC + file_codecs.encode(self.state)
+        _write_atomic(self.filename, state_data)
+
+        _save_states[self.filename] = self.save_state
+
+        for path in _save_files(self.filename):
+            if path not in (floor_path, journal_path):
+                os.remove(path)
+        return size + len(state_data)
+
+
+def snapshot_engine(engine: Engine, filename: str) -> SaveSnapshot:
+    # the file names written are compared with the ones found on disk
+    filename = os.path.abspath(filename)
+    state = _save_states.get(filename)
+    floor_id = engine.game_map.floor_id
+    messages = engine.message_log.messages
+
+    floor = None
+    if state is None or state.floor_id != floor_id:
+        floor = pickle.dumps((floor_id, engine.game_map.tile_ids))
+
+    new_journal = state is None or state.message_log is not engine.message_log
+    if new_journal:
+        # a different game, start a new journal
+        journal_id = uuid.uuid4().hex
+        first_index = 0
+    else:
+        # the last written message may have been stacked since
+        journal_id = state.journal_id
+        first_index = max(0, state.message_count - 1)
+    journal = b"".join(
+        pickle.dumps((index, messages[index]))
+        for index in range(first_index, len(messages))
+    )
+
+    buffer = io.BytesIO()
+    _EnginePickler(buffer, engine, journal_id).dump(engine)
+
+    return SaveSnapshot(
+        filename,
+        buffer.getvalue(),
+        floor_id,
+        floor,
+        journal_id,
+        journal,
+        new_journal,
+        SaveState(floor_id, journal_id, engine.message_log, len(messages)),
+    )
+
+
+def save_engine(engine: Engine, filename: str) -> int:
+    return snapshot_engine(engine, filename).write()
+
+
+def delete_save(filename: str) -> None:
+    filename = os.path.abspath(filename)
+    if os.path.exists(filename):
+        os.remove(filename)
+    for path in _save_files(filename):
+        os.remove(path)
+    _save_states.pop(filename, None)
+
+
+class Autosaver:
+    # saves every `interval` turns and whenever a new floor is reached
+    # the snapshot is taken on the main thread, compression and writing
+    # run on a worker thread so the game loop never waits for the disk
+    def __init__(self, filename: str, interval: int) -> None:
+        self.filename = filename
+        self.interval = interval
+        self.turns_since_save = 0
+        self.last_floor: Optional[int] = None
+
+        # metrics of the last finished autosave
+        self.saves = 0
+        self.snapshot_seconds = 0.0
+        self.write_seconds = 0.0
+        self.size = 0
+
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending: Optional[Future[None]] = None
+
+    def __getstate__(self) -> dict:
+        # the worker can't be pickled, a loaded game starts a new one
+        state = self.__dict__.copy()
+        state["_executor"] = None
+        state["_pending"] = None
+        return state
+
+    @property
+    def metrics(self) -> Dict[str, float]:
+        return {
+            "saves": self.saves,
+            "snapshot_ms": self.snapshot_seconds * 1000,
+            "write_ms": self.write_seconds * 1000,
+            "size_bytes": self.size,
+        }
+
+    def tick(self, engine: Engine) -> None:
+        # called once after every turn
+        self.turns_since_save += 1
+        floor = engine.game_world.current_floor
+        # last_floor is set when the game starts, see setup_game.new_game,
+        # without it the floor counts as changed
+        if floor != self.last_floor or self.turns_since_save >= self.interval:
+            self.last_floor = floor
+            self.save(engine)
+
+    def save(self, engine: Engine) -> None:
+        self.turns_since_save = 0
+        start = time.perf_counter()
+        snapshot = snapshot_engine(engine, self.filename)
+        self.snapshot_seconds = time.perf_counter() - start
+
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1)
+        # the single worker keeps the writes, and so the journal, in order
+        self._pending = self._executor.submit(self._write, snapshot)
+
+    def _write(self, snapshot: SaveSnapshot) -> None:
+        start = time.perf_counter()
+        try:
+            self.size = snapshot.write()
+        except OSError:
+            traceback.print_exc()
+            # forget what was written so the next save writes every file again
+            _save_states.pop(snapshot.filename, None)
+            return
+        self.write_seconds = time.perf_counter() - start
+        self.saves += 1
+
+    def wait(self) -> None:
+        # blocks until the autosave in flight is on disk
+        if self._pending is not None:
+            self._pending.result()
+            self._pending = None
+
+
+def load_engine(filename: str) -> Engine:
+    filename = os.path.abspath(filename)
+    with open(filename, "rb") as f:
+        data = f.read()
+    if not data.startswith(SAVE_MAGIC):
+        raise IncompatibleSave(
+            "This save is from an older version of the game and can't be loaded"
+        )
+
+    unpickler = _EngineUnpickler(
+        io.BytesIO(file_codecs.decode(data[len(SAVE_MAGIC) :])), filename
+    )
+    engine = unpickler.load()
+    _save_states[filename] = SaveState(
+        unpickler.floor_id,
+        unpickler.journal_id,
+        engine.message_log,
+        len(engine.message_log.messages),
+    )
+    return engine
@@ -1,8 +1,6 @@
 from __future__ import annotations
 
 import copy
-import lzma
-import pickle
 import traceback
 
 from PIL import Image
@@ -14,11 +12,13 @@ import numpy as np
 
 import color
 from engine import Engine
+import exceptions
 import entity_factory
 import input_handlers
 from game_map import GameWorld
+import save_files
 
-from components.settings import KEYBINDS
+from components.settings import KEYBINDS, SAVE_FILE
 
 background_image = np.asarray(Image.open("Res/main_menu.png").convert("RGB"))[:, :, :3]
 
@@ -50,6 +50,8 @@ def new_game() -> Engine:
     )
     engine.game_world.generate_floor()
     engine.update_fov()
+    # so climbing the stairs right away counts as a new floor
+    engine.autosaver.last_floor = engine.game_world.current_floor
 
     engine.message_log.add_message("Flesh Tower", color.welcome_text)
 
@@ -57,8 +59,7 @@ def new_game() -> Engine:
 
 
 def load_game(filename: str) -> Engine:
-    with open(filename, "rb") as f:
-        engine = pickle.loads(lzma.decompress(f.read()))
+    engine = save_files.load_engine(filename)
     assert isinstance(engine, Engine)
     return engine
 
@@ -98,7 +99,7 @@ class MainMenu(input_handlers.BaseEventHandler):
             raise SystemExit()
         elif event.sym == tcod.event.KeySym.C:
             try:
-                return input_handlers.MainGameEventHandler(load_game("savegame.sav"))
+                return input_handlers.MainGameEventHandler(load_game(SAVE_FILE))
             except FileNotFoundError:
                 return input_handlers.PopupMessage(
                     self,
@@ -106,6 +107,13 @@ class MainMenu(input_handlers.BaseEventHandler):
                     halved=True,
                     alignment=libtcodpy.CENTER,
                 )
+            except exceptions.IncompatibleSave as exc:
+                return input_handlers.PopupMessage(
+                    self,
+                    str(exc),
+                    halved=True,
+                    alignment=libtcodpy.CENTER,
+                )
             except Exception as exc:
                 traceback.print_exc()
                 return input_handlers.PopupMessage(
@@ -0,0 +1,9 @@
+import os
+import sys
+
+CODE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# the game runs from the repository root with Code on the path,
+# setup_game loads its images relative to it on import
+sys.path.insert(0, CODE_DIR)
+os.chdir(os.path.dirname(CODE_DIR))
@@ -0,0 +1,78 @@
+import os
+
+import pytest
+
+import actions
+import save_files
+import setup_game
+from components.settings import SAVE_FILE
+
+
+@pytest.fixture
+def save_dir(tmp_path, monkeypatch):
+    # SAVE_FILE is relative, saves land in the working directory
+    monkeypatch.chdir(tmp_path)
+    save_files._save_states.clear()
+    yield tmp_path
+    save_files._save_states.clear()
+
+
+def reload():
+    # loads like a new session would, without knowing what was written
+    save_files._save_states.clear()
+    return setup_game.load_game(SAVE_FILE)
+
+
+def test_save_as_round_trip(save_dir):
+    engine = setup_game.new_game()
+    engine.message_log.add_message("before saving")
+    engine.save_as(SAVE_FILE)
+
+    names = sorted(os.listdir(save_dir))
+    assert names[0] == SAVE_FILE
+    assert [name.rsplit(".", 1)[0] for name in names[1:]] == [
+        f"{SAVE_FILE}.floor",
+        f"{SAVE_FILE}.log",
+    ]
+    loaded = reload()
+    assert loaded.message_log.messages[-1].plain_text == "before saving"
+    assert (loaded.game_map.tile_ids == engine.game_map.tile_ids).all()
+
+
+def test_autosaves_round_trip(save_dir):
+    engine = setup_game.new_game()
+    autosaver = save_files.Autosaver(SAVE_FILE, interval=1)
+    engine.message_log.add_message("first autosave")
+    autosaver.save(engine)
+    engine.message_log.add_message("second autosave")
+    autosaver.save(engine)
+    autosaver.wait()
+
+    assert len(os.listdir(save_dir)) == 3
+    loaded = reload()
+    assert [message.plain_text for message in loaded.message_log.messages[-2:]] == [
+        "first autosave",
+        "second autosave",
+    ]
+
+
+def test_delete_save(save_dir):
+    engine = setup_game.new_game()
+    engine.save_as(SAVE_FILE)
+    save_files.delete_save(SAVE_FILE)
+    assert os.listdir(save_dir) == []
+
+
+def test_first_stair_climb_autosaves(save_dir, monkeypatch):
+    engine = setup_game.new_game()
+    engine.autosaver.filename = SAVE_FILE
+    player = engine.player
+    monkeypatch.setattr(
+        engine.game_map, "upstairs_location", (player.x, player.y), raising=False
+    )
+    actions.TakeStairsAction(player).perform()
+    engine.autosaver.tick(engine)
+    engine.autosaver.wait()
+
+    assert engine.autosaver.metrics["saves"] == 1
+    assert reload().game_world.current_floor == engine.game_world.current_floor
@@ -1,4 +1,6 @@
-from typing import Tuple
+import random
+from typing import List, Optional, Tuple, Union
+
 import numpy as np
 
 # this is like a structure in ABAP
@@ -42,6 +44,20 @@ def new_tile(
 # SHROUD for entire map not in fov
 SHROUD = np.array((ord(" "), (255, 255, 255), (0, 0, 0)), dtype=graphic_dt)
 
+wall = new_tile(
+    walkable=False,
+    transparent=False,
+    dark=(9003, (255, 255, 255), (0, 0, 0)),
+    light=(9000, (255, 255, 255), (0, 0, 0)),
+)
+
+floor = new_tile(
+    walkable=True,
+    transparent=True,
+    dark=(9004, (255, 255, 255), (0, 0, 0)),
+    light=(9001, (255, 255, 255), (0, 0, 0)),
+)
+
 stairs_up = new_tile(
     walkable=True,
     transparent=True,
@@ -49,30 +65,49 @@ stairs_up = new_tile(
     light=(9002, (255, 255, 255), (0, 0, 0)),
 )
 
-
-def randFloor() -> np.ndarray:
-    floor = new_tile(
-        walkable=True,
-        transparent=True,
-        dark=(9004, (255, 255, 255), (0, 0, 0)),
-        light=(9001, (255, 255, 255), (0, 0, 0)),
-    )
-    return floor
-
-
-def randWall() -> np.ndarray:
-    wall = new_tile(
-        walkable=False,
-        transparent=False,
-        dark=(9003, (255, 255, 255), (0, 0, 0)),
-        light=(9000, (255, 255, 255), (0, 0, 0)),
-    )
-    return wall
-
-
 chest = new_tile(
     walkable=False,
     transparent=False,
     dark=(0, (255, 255, 255), (0, 0, 0)),
     light=(0, (255, 255, 255), (0, 0, 0)),
 )
+
+# the palette of every tile type, built once. A tile id is its index here,
+# maps store a uint8 grid of ids. New tiles are appended so the ids of the
+# existing ones (and with them saves and cached floors) never change
+TILES = np.array([wall, floor, stairs_up, chest], dtype=tile_dt)
+WALL, FLOOR, STAIRS_UP, CHEST = range(len(TILES))
+assert len(TILES) <= 256, "tile ids are stored as uint8"
+
+# the ids randFloorId and randWallId pick from, add a look by registering
+# another tile and appending its id
+FLOOR_VARIANTS = [FLOOR]
+WALL_VARIANTS = [WALL]
+
+
+def random_tile_ids(
+    variants: List[int],
+    size: Optional[int] = None,
+    rng: Optional[random.Random] = None,
+) -> Union[int, np.ndarray]:
+    # one tile id, or `size` ids picked from the variants at once
+    # a single variant is never drawn for, so it costs no randomness
+    if len(variants) == 1 or size is None:
+        return variants[0]
+    seed = rng.getrandbits(32) if rng else None
+    return np.random.default_rng(seed).choice(
+        np.array(variants, dtype=np.uint8), size=size
+    )
+
+
+def randFloorId(
+    size: Optional[int] = None, rng: Optional[random.Random] = None
+) -> Union[int, np.ndarray]:
+    return random_tile_ids(FLOOR_VARIANTS, size, rng)
+
+
+def randWallId(
+    size: Optional[int] = None, rng: Optional[random.Random] = None
+) -> Union[int, np.ndarray]:
+    return random_tile_ids(WALL_VARIANTS, size, rng)
+